@@ -1,66 +1,67 @@
 import frappe
-from united_addon.api.utils import gen_response
-from bs4 import BeautifulSoup
-from frappe.utils import cstr, escape_html, get_url
+from united_addon.api.utils import gen_response, set_response_header
+from united_addon.api.identity import get_identity
+from united_addon.api.tokens import issue_tokens
+from united_addon.api.login_throttle import check_login_rate, get_unlinked_error, set_unlinked_error
+from frappe.utils import add_days, cint, cstr, escape_html, get_datetime, get_url, now_datetime
+from frappe.utils.password import get_decrypted_password, set_encrypted_password
 from frappe.exceptions import AuthenticationError
 
 
+# API keys issued by login are rotated after this many days (site config: united_addon_api_key_max_age_days)
+API_KEY_MAX_AGE_DAYS = 90
+
+
 # Login
 @frappe.whitelist(allow_guest=True)
-def login(usr, pwd):
+def login(usr, pwd, rotate_keys=0, signed_token=0):
     try:
+        # Throttle per username and per IP before any password work
+        usr_key = cstr(usr).strip().lower()
+        retry_after = check_login_rate(usr_key)
+        if retry_after:
+            set_response_header("Retry-After", str(retry_after))
+            frappe.local.response.http_status_code = 429
+            frappe.local.response["message"] = "Too many login attempts. Please try again later."
+            frappe.local.response["error_type"] = "rate_limited"
+            return
+        
+        # Recently authenticated but unlinked users get the same answer without re-authenticating
+        unlinked_error = get_unlinked_error(usr_key, pwd)
+        if unlinked_error:
+            frappe.local.response.http_status_code = 422
+            frappe.local.response.update(unlinked_error)
+            return
+        
         # Authenticate user
         login_manager = frappe.auth.LoginManager()
         login_manager.authenticate(user=usr, pwd=pwd)
-        login_manager.post_login()
         
-        # Fetch user details
-        user = frappe.get_doc('User', frappe.session.user)
+        # Resolve user, employee and sales partner details (cached)
+        identity = get_identity(login_manager.user)
         
         # Check if user is linked to an employee
-        if not frappe.db.exists('Employee', {'user_id': frappe.session.user}):
-            frappe.local.response.http_status_code = 422
-            frappe.local.response["message"] = "User is not linked to any employee. Please contact administrator."
-            frappe.local.response["error_type"] = "no_employee_link"
-            return
-        
-        # Get employee data
-        emp_data = frappe.db.get_value('Employee', {'user_id': frappe.session.user}, 
-                                       ['name', 'first_name', 'last_name', 'gender', 'date_of_birth', 
-                                        'employee_name', 'designation', 'department'], as_dict=1)
-        
-        if not emp_data:
-            frappe.local.response.http_status_code = 422
-            frappe.local.response["message"] = "Employee data not found. Please contact administrator."
-            frappe.local.response["error_type"] = "employee_not_found"
+        # Unlinked users are rejected before a session is created
+        if not identity.employee:
+            reject_unlinked(usr_key, pwd, "User is not linked to any employee. Please contact administrator.", "no_employee_link")
             return
         
         # Check if employee is linked to a sales partner
-        if not frappe.db.exists('Sales Partner', {'custom_employee': emp_data.name}):
-            frappe.local.response.http_status_code = 422
-            frappe.local.response["message"] = "Employee is not linked to any sales partner. Please contact administrator."
-            frappe.local.response["error_type"] = "no_sales_partner_link"
+        if not identity.sales_partner:
+            reject_unlinked(usr_key, pwd, "Employee is not linked to any sales partner. Please contact administrator.", "no_sales_partner_link")
             return
         
-        # Get sales partner data
-        sales_partner_data = frappe.db.get_value('Sales Partner', {'custom_employee': emp_data.name}, 
-                                                 ['name', 'partner_type'], as_dict=1)
-        
-        if not sales_partner_data:
-            frappe.local.response.http_status_code = 422
-            frappe.local.response["message"] = "Sales partner data not found. Please contact administrator."
-            frappe.local.response["error_type"] = "sales_partner_not_found"
-            return
+        login_manager.post_login()
         
-        # Generate API key and secret
-        api_generate = generate_keys(user)
+        # Reuse the existing API key and secret, rotating only on demand or expiry
+        api_generate = get_api_credentials(frappe.session.user, rotate=cint(rotate_keys))
         if not api_generate:
             frappe.local.response.http_status_code = 422
             frappe.local.response["message"] = "API Key Generation Failed"
             return
         
         # Handle image URL
-        image_url = user.user_image or ""
+        image_url = identity.user_image or ""
         if image_url and image_url.startswith('/files'):
             image_url = get_url(image_url)
         
@@ -69,21 +70,25 @@ def login(usr, pwd):
         
         # Preparing the response
         frappe.response["user_details"] = {
-            "first_name": escape_html(emp_data.first_name or ""),
-            "last_name": escape_html(emp_data.last_name or ""),
-            "gender": escape_html(emp_data.gender or ""),
-            "birth_date": emp_data.date_of_birth or "",
+            "first_name": escape_html(identity.first_name or ""),
+            "last_name": escape_html(identity.last_name or ""),
+            "gender": escape_html(identity.gender or ""),
+            "birth_date": identity.date_of_birth or "",
             "email": frappe.session.user,
-            "employee_name": emp_data.employee_name or "",
-            "designation": emp_data.designation or "",
-            "department": emp_data.department or "",
-            "partner_type": sales_partner_data.partner_type or "",
-            "employee_id": emp_data.name,
-            "sales_partner_id": sales_partner_data.name,
+            "employee_name": identity.employee_name or "",
+            "designation": identity.designation or "",
+            "department": identity.department or "",
+            "partner_type": identity.partner_type or "",
+            "employee_id": identity.employee,
+            "sales_partner_id": identity.sales_partner,
             "image": image_url,
-            "enabled": user.enabled
+            "enabled": identity.enabled
         }
         frappe.response["token"] = "Token " + token_string
+        
+        # Optional signed access/refresh tokens (Authorization: Access <access_token>)
+        if cint(signed_token):
+            frappe.response.update(issue_tokens(identity))
         frappe.response["message"] = "Login successful"
         
     except AuthenticationError:
@@ -98,16 +103,51 @@ def login(usr, pwd):
     return
 
 
+# Briefly remembered so repeat attempts skip authentication
+def reject_unlinked(usr_key, pwd, message, error_type):
+    error = {"message": message, "error_type": error_type}
+    set_unlinked_error(usr_key, pwd, error)
+    frappe.local.response.http_status_code = 422
+    frappe.local.response.update(error)
+
+
+# Existing Key and Token
+def get_api_credentials(user, rotate=False):
+    try:
+        api_key, generated_on = frappe.db.get_value("User", user, ["api_key", "custom_api_key_generated_on"])
+        if api_key and not rotate and not is_api_key_expired(generated_on):
+            api_secret = get_decrypted_password("User", user, "api_secret", raise_exception=False)
+            if api_secret:
+                return {
+                    "api_key": api_key,
+                    "api_secret": api_secret
+                }
+    except Exception as e:
+        frappe.log_error(f"API Key lookup error: {str(e)}", "Generate Keys")
+
+    return generate_keys(user)
+
+
+def is_api_key_expired(generated_on):
+    # Keys issued before the generated-on field existed are rotated once
+    if not generated_on:
+        return True
+    max_age_days = cint(frappe.conf.get("united_addon_api_key_max_age_days") or API_KEY_MAX_AGE_DAYS)
+    return get_datetime(generated_on) < add_days(now_datetime(), -max_age_days)
+
+
 # Generate Key and Token
 def generate_keys(user):
     try:
         api_secret = frappe.generate_hash(length=15)
         api_key = frappe.generate_hash(length=15)
 
-        # Save the keys to the user
-        user.api_key = api_key
-        user.api_secret = api_secret
-        user.save(ignore_permissions=True)
+        # Targeted column update instead of a full User save with its validations and hooks
+        frappe.db.set_value("User", user, {
+            "api_key": api_key,
+            "custom_api_key_generated_on": now_datetime()
+        }, update_modified=False)
+        set_encrypted_password("User", user, api_secret, "api_secret")
         frappe.db.commit()
 
         # Return the generated keys
@@ -117,4 +157,4 @@ def generate_keys(user):
         }
     except Exception as e:
         frappe.log_error(f"API Key generation error: {str(e)}", "Generate Keys")
-        return None
\ No newline at end of file
+        return None
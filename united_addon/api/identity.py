@@ -0,0 +1,133 @@
+import frappe
+from united_addon.api.metrics import record_cache
+
+
+# Identity resolution: User -> Employee -> Sales Partner
+# Cached in redis and memoized per request, cleared through doc_events in hooks.py
+
+IDENTITY_CACHE_PREFIX = "united_addon:identity:"
+IDENTITY_CACHE_TTL = 6 * 60 * 60
+
+EMPLOYEE_FIELDS = [
+    "name", "first_name", "last_name", "gender", "date_of_birth",
+    "employee_name", "designation", "department",
+]
+
+
+def get_identity(user=None):
+    user = user or frappe.session.user
+
+    memo = _get_request_memo()
+    if user in memo:
+        return memo[user]
+
+    # Signed access tokens already carry the employee and sales partner
+    claims = getattr(frappe.local, "united_addon_token_claims", None)
+    if claims and claims.sub == user:
+        identity = frappe._dict({
+            "user": user,
+            "enabled": 1,
+            "employee": claims.emp,
+            "sales_partner": claims.sp,
+        })
+        memo[user] = identity
+        return identity
+
+    identity = frappe.cache.get_value(IDENTITY_CACHE_PREFIX + user)
+    record_cache(identity is not None)
+    if identity is None:
+        identity = _load_identity(user)
+        frappe.cache.set_value(IDENTITY_CACHE_PREFIX + user, identity, expires_in_sec=IDENTITY_CACHE_TTL)
+
+    memo[user] = identity
+    return identity
+
+
+def get_identity_error(identity):
+    # Same messages the sales person endpoints have always returned
+    if not identity.enabled:
+        return "User is not active"
+    if not identity.employee:
+        return "No active employee linked to user"
+    if not identity.sales_partner:
+        return "No Sales Partner linked to employee"
+    return None
+
+
+def _load_identity(user):
+    identity = frappe._dict({
+        "user": user,
+        "enabled": 0,
+        "user_image": "",
+        "employee": None,
+        "sales_partner": None,
+        "partner_type": None,
+    })
+
+    # Single lookup across User, Employee and Sales Partner
+    employee_columns = ", ".join(f"emp.{fieldname}" for fieldname in EMPLOYEE_FIELDS if fieldname != "name")
+    data = frappe.db.sql(f"""
+        SELECT
+            usr.enabled, usr.user_image,
+            emp.name AS employee, {employee_columns},
+            sp.name AS sales_partner, sp.partner_type
+        FROM `tabUser` usr
+        LEFT JOIN `tabEmployee` emp ON emp.user_id = usr.name
+        LEFT JOIN `tabSales Partner` sp ON sp.custom_employee = emp.name
+        WHERE usr.name = %s
+        LIMIT 1
+    """, (user,), as_dict=1)
+    if not data:
+        return identity
+
+    identity.update(data[0])
+    identity.user_image = identity.user_image or ""
+    return identity
+
+
+def _get_request_memo():
+    if not hasattr(frappe.local, "united_addon_identity"):
+        frappe.local.united_addon_identity = {}
+    return frappe.local.united_addon_identity
+
+
+def clear_identity(users):
+    from united_addon.api.tokens import revoke_user_tokens
+    from united_addon.api.login_throttle import clear_unlinked_error
+
+    memo = _get_request_memo()
+    for user in set(users):
+        if not user:
+            continue
+        frappe.cache.delete_value(IDENTITY_CACHE_PREFIX + user)
+        memo.pop(user, None)
+        # A newly linked user can log in straight away
+        clear_unlinked_error([user.lower()])
+        # Access tokens embed the old links, the app refreshes them
+        revoke_user_tokens(user, include_refresh=False)
+
+
+# doc_events handler for User, Employee and Sales Partner
+def clear_identity_cache(doc, method=None, *args):
+    users = []
+    doc_before_save = doc.get_doc_before_save() if method == "on_update" else None
+
+    if doc.doctype == "User":
+        users.append(doc.name)
+        if method == "after_rename" and args:
+            users.append(args[0])
+
+    elif doc.doctype == "Employee":
+        users.append(doc.get("user_id"))
+        if doc_before_save:
+            users.append(doc_before_save.get("user_id"))
+
+    elif doc.doctype == "Sales Partner":
+        employees = {doc.get("custom_employee")}
+        if doc_before_save:
+            employees.add(doc_before_save.get("custom_employee"))
+        employees.discard(None)
+        if employees:
+            users.extend(frappe.get_all("Employee", filters={"name": ["in", list(employees)]}, pluck="user_id"))
+
+    clear_identity(users)
@@ -0,0 +1,179 @@
+from collections import defaultdict
+
+import frappe
+from frappe.utils import cint, flt, get_first_day, get_last_day, getdate, nowdate
+from united_addon.api.utils import gen_response
+from united_addon.api.identity import get_identity
+from united_addon.api.ledger_archive import ledger_source
+from united_addon.api.replica import read_from_replica
+
+
+# Monthly leaderboards of credited points in redis sorted sets, one per period.
+# Kept current by the ledger doc_events and rebuildable from the ledger;
+# rank lookups are ZREVRANK, O(log n)
+
+LEADERBOARD_PREFIX = "united_addon:leaderboard:"
+LEADERBOARD_TTL = 400 * 24 * 60 * 60
+MAX_LEADERBOARD_LIMIT = 100
+
+# While a period is rebuilt, increments are also journaled and replayed over the rebuilt
+# totals when they are swapped in. The flag expires on its own if a rebuild dies
+SCRATCH_SUFFIX = ":rebuild"
+JOURNAL_SUFFIX = ":journal"
+REBUILDING_SUFFIX = ":rebuilding"
+REBUILD_TIMEOUT = 60 * 60
+
+# KEYS: leaderboard, rebuilding flag, journal; ARGV: ttl, points, sales partner
+INCREMENT_SCRIPT = """
+redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('HINCRBYFLOAT', KEYS[3], ARGV[3], ARGV[2])
+end
+"""
+# KEYS: scratch, leaderboard, journal, rebuilding flag; ARGV: ttl
+SWAP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+else
+    redis.call('DEL', KEYS[2])
+end
+local journal = redis.call('HGETALL', KEYS[3])
+for idx = 1, #journal, 2 do
+    redis.call('ZINCRBY', KEYS[2], journal[idx + 1], journal[idx])
+end
+redis.call('DEL', KEYS[3], KEYS[4])
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+"""
+
+
+def get_period(date=None):
+    return getdate(date or nowdate()).strftime("%Y-%m")
+
+
+def get_leaderboard_key(period):
+    return frappe.cache.make_key(LEADERBOARD_PREFIX + period)
+
+
+def update_leaderboards(rows, sign=1):
+    # Only credits count towards the ranking. Collected during the request and applied
+    # once the rows are committed, a rolled back posting never reaches the ranking
+    pending = getattr(frappe.local, "united_addon_pending_leaderboard", None)
+    if pending is None:
+        pending = frappe.local.united_addon_pending_leaderboard = defaultdict(float)
+        frappe.db.after_commit.add(flush_leaderboards)
+        frappe.db.after_rollback.add(discard_leaderboards)
+
+    for row in rows:
+        points = flt(row.get("points"))
+        if points > 0:
+            pending[(get_period(row.get("date")), row.get("sales_partner"))] += points * sign
+
+
+def discard_leaderboards():
+    frappe.local.united_addon_pending_leaderboard = None
+
+
+def flush_leaderboards():
+    pending = getattr(frappe.local, "united_addon_pending_leaderboard", None) or {}
+    frappe.local.united_addon_pending_leaderboard = None
+    increments = {key: points for key, points in pending.items() if points}
+    if not increments:
+        return
+
+    pipeline = frappe.cache.pipeline()
+    for (period, sales_partner), points in increments.items():
+        key = get_leaderboard_key(period)
+        pipeline.eval(INCREMENT_SCRIPT, 3, key, key + REBUILDING_SUFFIX, key + JOURNAL_SUFFIX,
+                      LEADERBOARD_TTL, points, sales_partner)
+    pipeline.execute()
+
+
+def get_partner_rank(sales_partner, period=None):
+    key = get_leaderboard_key(period or get_period())
+    pipeline = frappe.cache.pipeline()
+    pipeline.zrevrank(key, sales_partner)
+    pipeline.zscore(key, sales_partner)
+    pipeline.zcard(key)
+    rank, points, participants = pipeline.execute()
+    return {
+        "period": period or get_period(),
+        "rank": rank + 1 if rank is not None else None,
+        "points": points or 0,
+        "participants": participants
+    }
+
+
+def get_top_partners(period=None, limit=50):
+    entries = frappe.cache.zrevrange(get_leaderboard_key(period or get_period()), 0, limit - 1, withscores=True)
+    sales_partners = [member.decode() for member, _ in entries]
+    names = dict(frappe.get_all(
+        "Sales Partner", filters={"name": ["in", sales_partners]}, fields=["name", "partner_name"], as_list=1
+    )) if sales_partners else {}
+    return [
+        {"rank": idx + 1, "sales_partner": sales_partner, "partner_name": names.get(sales_partner) or sales_partner, "points": score}
+        for idx, (sales_partner, (_, score)) in enumerate(zip(sales_partners, entries))
+    ]
+
+
+def rebuild_leaderboard(period=None, chunk_size=500):
+    # Build into a scratch key a chunk of partners at a time, then swap it in atomically
+    # and replay the increments committed after the totals were read
+    period = period or get_period()
+    month_start = getdate(period + "-01")
+    key = get_leaderboard_key(period)
+    scratch_key, journal_key, rebuilding_key = key + SCRATCH_SUFFIX, key + JOURNAL_SUFFIX, key + REBUILDING_SUFFIX
+    frappe.cache.delete(scratch_key, journal_key)
+    frappe.cache.set(rebuilding_key, 1, ex=REBUILD_TIMEOUT)
+    # Journaling is on before the read snapshot is taken, so no committed row is missed. A row
+    # committed in the instant between the two is counted twice, until the next rebuild
+    frappe.db.commit()
+
+    sales_partners = frappe.get_all("Sales Partner", pluck="name", order_by="name")
+    for start in range(0, len(sales_partners), chunk_size):
+        chunk = tuple(sales_partners[start:start + chunk_size])
+        totals = frappe.db.sql(f"""
+            SELECT sales_partner, SUM(points) FROM {ledger_source()}
+            WHERE sales_partner IN %(chunk)s AND date BETWEEN %(from_date)s AND %(to_date)s
+                AND points > 0 AND docstatus < 2
+            GROUP BY sales_partner
+        """, {"chunk": chunk, "from_date": get_first_day(month_start), "to_date": get_last_day(month_start)})
+        if totals:
+            frappe.cache.zadd(scratch_key, {sales_partner: flt(points) for sales_partner, points in totals})
+
+    frappe.cache.eval(SWAP_SCRIPT, 4, scratch_key, key, journal_key, rebuilding_key, LEADERBOARD_TTL)
+
+
+def rebuild_current_leaderboard():
+    rebuild_leaderboard(get_period())
+
+
+#Leaderboard
+@frappe.whitelist()
+@read_from_replica
+def get_leaderboard(period=None, limit=50):
+    try:
+        try:
+            period = get_period(period + "-01") if period else get_period()
+        except Exception:
+            return gen_response(400, "Period must be in YYYY-MM format", {})
+        limit = min(max(1, cint(limit)), MAX_LEADERBOARD_LIMIT)
+
+        response_data = {
+            "period": period,
+            "top": get_top_partners(period, limit),
+            "my_rank": None
+        }
+
+        # The caller's own position when they are a sales partner
+        identity = get_identity()
+        if identity.sales_partner:
+            response_data["my_rank"] = get_partner_rank(identity.sales_partner, period)
+
+        return gen_response(200, "Leaderboard Fetched Successfully", response_data)
+
+    except Exception as ex:
+        frappe.log_error(frappe.get_traceback(), "Leaderboard Error")
+        return gen_response(500, "Failed to fetch leaderboard", str(ex))
@@ -0,0 +1,213 @@
+import frappe
+from frappe.utils import add_days, getdate, nowdate
+
+
+# Hot/cold split of Sales Partner Points Ledgers. Rows dated before the archive
+# cutoff (the start of the oldest open fiscal year) live in ARCHIVE_TABLE, and
+# ARCHIVE_SUMMARY_TABLE keeps one row per partner with the archived points so
+# balances stay correct. Every archived row is older than the cutoff, so readers
+# go to the hot table first and only reach into the archive when the requested
+# range or page goes past the cutoff. Back-dated rows can still land in the hot
+# table before the cutoff; pages that reach that far merge both tables, and the
+# next archive run moves them over
+
+LEDGER_TABLE = "tabSales Partner Points Ledgers"
+ARCHIVE_TABLE = "__sales_partner_ledger_archive"
+ARCHIVE_SUMMARY_TABLE = "__sales_partner_ledger_archive_summary"
+CUTOFF_KEY = "united_addon_ledger_archive_cutoff"
+CUTOFF_CACHE_KEY = "united_addon:ledger_archive_cutoff"
+
+
+def get_archive_cutoff():
+    cutoff = frappe.cache.get_value(CUTOFF_CACHE_KEY, generator=lambda: frappe.db.get_global(CUTOFF_KEY) or "")
+    return getdate(cutoff) if cutoff else None
+
+
+def fetch_ledger_page(conditions, params, limit, offset=0, cursor=None, from_date=None,
+                      fields="name, date, points, sales_invoice"):
+    params = list(params)
+    if cursor:
+        conditions += " AND (date < %s OR (date = %s AND name < %s))"
+        params.extend([cursor[0], cursor[0], cursor[1]])
+
+    cutoff = get_archive_cutoff()
+    if not cutoff or (from_date and getdate(from_date) >= cutoff):
+        return _select_page(LEDGER_TABLE, fields, conditions, params, limit, offset)
+
+    if not (cursor and getdate(cursor[0]) < cutoff):
+        rows = _select_page(LEDGER_TABLE, fields, conditions, params, limit, offset)
+        # A full page that ends on or after the cutoff is ahead of every archived row
+        if len(rows) >= limit and getdate(rows[-1].date) >= cutoff:
+            return rows
+
+    return _select_merged_page(fields, conditions, params, limit, offset)
+
+
+def fetch_recent_ledgers(sales_partners, limit, fields="name, date, points, sales_invoice, sales_partner"):
+    # Last `limit` rows of each partner, ordered by partner then date DESC, one windowed query per table
+    rows = _select_recent(LEDGER_TABLE, fields, sales_partners, limit)
+    cutoff = get_archive_cutoff()
+    if not cutoff:
+        return rows
+
+    by_partner = {}
+    for row in rows:
+        by_partner.setdefault(row.sales_partner, []).append(row)
+    # Partners whose hot rows don't fill the window on or after the cutoff continue into the archive
+    short = [sp for sp in sales_partners
+             if len(by_partner.get(sp, [])) < limit or getdate(by_partner[sp][-1].date) < cutoff]
+    if not short:
+        return rows
+
+    for row in _select_recent(ARCHIVE_TABLE, fields, short, limit):
+        by_partner.setdefault(row.sales_partner, []).append(row)
+    merged = []
+    for sales_partner in sorted(by_partner):
+        partner_rows = by_partner[sales_partner]
+        if sales_partner in short:
+            partner_rows = sorted(partner_rows, key=lambda row: (getdate(row.date), row.name), reverse=True)[:limit]
+        merged.extend(partner_rows)
+    return merged
+
+
+def count_ledgers(conditions, params, cap, from_date=None):
+    cutoff = get_archive_cutoff()
+    count = _count(LEDGER_TABLE, conditions, params, cap)
+    if cutoff and count <= cap and not (from_date and getdate(from_date) >= cutoff):
+        count += _count(ARCHIVE_TABLE, conditions, params, cap - count)
+    return count
+
+
+def get_archived_points(sales_partners):
+    if not get_archive_cutoff():
+        return {}
+    return dict(frappe.db.sql(f"""
+        SELECT sales_partner, archived_points FROM `{ARCHIVE_SUMMARY_TABLE}`
+        WHERE sales_partner IN %(sales_partners)s
+    """, {"sales_partners": tuple(sales_partners)}))
+
+
+def ledger_source(columns="sales_partner, date, points, docstatus"):
+    # Table expression over hot and archived rows, for rebuilds that need the full history
+    if not get_archive_cutoff():
+        return f"`{LEDGER_TABLE}`"
+    return f"(SELECT {columns} FROM `{LEDGER_TABLE}` UNION ALL SELECT {columns} FROM `{ARCHIVE_TABLE}`) ledger_rows"
+
+
+def get_default_cutoff():
+    # Keep the current fiscal year hot, everything before it is closed
+    fiscal_year = frappe.get_all(
+        "Fiscal Year",
+        filters={"year_end_date": ["<", nowdate()], "disabled": 0},
+        fields=["year_end_date"],
+        order_by="year_end_date desc",
+        limit=1,
+    )
+    return add_days(fiscal_year[0].year_end_date, 1) if fiscal_year else None
+
+
+def archive_closed_periods(before_date=None, chunk_size=200):
+    cutoff = getdate(before_date) if before_date else get_default_cutoff()
+    current_cutoff = get_archive_cutoff()
+    if current_cutoff and (not cutoff or getdate(cutoff) <= current_cutoff):
+        # The cutoff stays, rows back-dated before it since the last run still move
+        cutoff = current_cutoff
+    elif not cutoff:
+        return
+    else:
+        ensure_archive_tables()
+
+        # Publish the new cutoff first: readers then consult both tables for older ranges
+        # while the rows move, and each chunk moves inside a single transaction
+        frappe.db.set_global(CUTOFF_KEY, str(cutoff))
+        frappe.db.commit()
+        frappe.cache.delete_value(CUTOFF_CACHE_KEY)
+
+    columns = ", ".join(f"`{c}`" for c in _get_common_columns())
+    sales_partners = frappe.db.sql_list(f"SELECT DISTINCT sales_partner FROM `{LEDGER_TABLE}` WHERE date < %s", (cutoff,))
+    for start in range(0, len(sales_partners), chunk_size):
+        chunk = tuple(sales_partners[start:start + chunk_size])
+        values = {"chunk": chunk, "cutoff": cutoff}
+
+        frappe.db.sql(f"""
+            INSERT INTO `{ARCHIVE_SUMMARY_TABLE}` (sales_partner, archived_points, archived_entries, archived_before)
+            SELECT sales_partner, SUM(points), COUNT(*), %(cutoff)s FROM `{LEDGER_TABLE}`
+            WHERE sales_partner IN %(chunk)s AND date < %(cutoff)s AND docstatus < 2
+            GROUP BY sales_partner
+            ON DUPLICATE KEY UPDATE
+                archived_points = archived_points + VALUES(archived_points),
+                archived_entries = archived_entries + VALUES(archived_entries),
+                archived_before = VALUES(archived_before)
+        """, values)
+        frappe.db.sql(f"""
+            INSERT INTO `{ARCHIVE_TABLE}` ({columns})
+            SELECT {columns} FROM `{LEDGER_TABLE}`
+            WHERE sales_partner IN %(chunk)s AND date < %(cutoff)s
+        """, values)
+        frappe.db.sql(f"DELETE FROM `{LEDGER_TABLE}` WHERE sales_partner IN %(chunk)s AND date < %(cutoff)s", values)
+        frappe.db.commit()
+
+
+def ensure_archive_tables():
+    frappe.db.sql_ddl(f"CREATE TABLE IF NOT EXISTS `{ARCHIVE_TABLE}` LIKE `{LEDGER_TABLE}`")
+    frappe.db.sql_ddl(f"""
+        CREATE TABLE IF NOT EXISTS `{ARCHIVE_SUMMARY_TABLE}` (
+            `sales_partner` VARCHAR(140) NOT NULL PRIMARY KEY,
+            `archived_points` DECIMAL(21, 9) NOT NULL DEFAULT 0,
+            `archived_entries` INT NOT NULL DEFAULT 0,
+            `archived_before` DATE
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    # Columns added to the doctype after the archive was created
+    archive_columns = set(frappe.db.sql_list(f"SHOW COLUMNS FROM `{ARCHIVE_TABLE}`"))
+    for column in frappe.db.sql(f"SHOW COLUMNS FROM `{LEDGER_TABLE}`", as_dict=1):
+        if column.Field not in archive_columns:
+            frappe.db.sql_ddl(f"ALTER TABLE `{ARCHIVE_TABLE}` ADD COLUMN `{column.Field}` {column.Type} NULL")
+
+
+def _get_common_columns():
+    archive_columns = set(frappe.db.sql_list(f"SHOW COLUMNS FROM `{ARCHIVE_TABLE}`"))
+    return [c for c in frappe.db.sql_list(f"SHOW COLUMNS FROM `{LEDGER_TABLE}`") if c in archive_columns]
+
+
+def _select_page(table, fields, conditions, params, limit, offset):
+    return frappe.db.sql(f"""
+        SELECT {fields} FROM `{table}`
+        WHERE {conditions}
+        ORDER BY date DESC, name DESC
+        LIMIT %s OFFSET %s
+    """, tuple(params) + (limit, offset), as_dict=1)
+
+
+def _select_recent(table, fields, sales_partners, limit):
+    return frappe.db.sql(f"""
+        SELECT {fields} FROM (
+            SELECT {fields}, ROW_NUMBER() OVER (PARTITION BY sales_partner ORDER BY date DESC, name DESC) AS row_num
+            FROM `{table}`
+            WHERE sales_partner IN %(sales_partners)s
+        ) ranked
+        WHERE row_num <= %(limit)s
+        ORDER BY sales_partner, date DESC, name DESC
+    """, {"sales_partners": tuple(sales_partners), "limit": limit}, as_dict=1)
+
+
+def _select_merged_page(fields, conditions, params, limit, offset):
+    # Each table contributes at most the rows up to the end of the page, back-dated
+    # hot rows sort in among the archived ones
+    return frappe.db.sql(f"""
+        SELECT * FROM (
+            (SELECT {fields} FROM `{LEDGER_TABLE}` WHERE {conditions} ORDER BY date DESC, name DESC LIMIT %s)
+            UNION ALL
+            (SELECT {fields} FROM `{ARCHIVE_TABLE}` WHERE {conditions} ORDER BY date DESC, name DESC LIMIT %s)
+        ) ledger_rows
+        ORDER BY date DESC, name DESC
+        LIMIT %s OFFSET %s
+    """, tuple(params) + (offset + limit,) + tuple(params) + (offset + limit, limit, offset), as_dict=1)
+
+
+def _count(table, conditions, params, cap=None):
+    if cap is None:
+        return frappe.db.sql(f"SELECT COUNT(*) FROM `{table}` WHERE {conditions}", tuple(params))[0][0]
+    return frappe.db.sql(f"""
+        SELECT COUNT(*) FROM (SELECT 1 FROM `{table}` WHERE {conditions} LIMIT %s) capped
+    """, tuple(params) + (cap + 1,))[0][0]
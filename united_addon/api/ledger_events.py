@@ -0,0 +1,84 @@
+from united_addon.api.sales_person import clear_ledger_count_cache
+from united_addon.api.points_summary import update_points_summary
+from united_addon.api.ledger_search import index_ledgers, remove_ledgers
+from united_addon.api.response_cache import bump_partner_version
+from united_addon.api.realtime import queue_ledger_event
+from united_addon.api.leaderboard import update_leaderboards
+from united_addon.api.replica import mark_partner_writes
+
+
+# doc_events handlers for Sales Partner Points Ledgers
+
+def apply_ledger_totals(rows, sign=1):
+    # Aggregates derived from the ledger: day/month rollup and the monthly leaderboard
+    update_points_summary(rows, sign=sign)
+    update_leaderboards(rows, sign=sign)
+
+
+def on_ledger_insert(doc, method=None):
+    apply_ledger_totals([doc])
+    index_ledgers([doc])
+    mark_partner_writes([doc.sales_partner])
+    queue_ledger_event([doc], "insert")
+
+
+def on_ledger_update(doc, method=None):
+    clear_ledger_count_cache(doc.sales_partner)
+    bump_partner_version(doc.sales_partner)
+    mark_partner_writes([doc.sales_partner])
+    doc_before_save = doc.get_doc_before_save()
+    if not doc_before_save:
+        return
+
+    if doc_before_save.sales_partner != doc.sales_partner:
+        clear_ledger_count_cache(doc_before_save.sales_partner)
+        bump_partner_version(doc_before_save.sales_partner)
+        mark_partner_writes([doc_before_save.sales_partner])
+
+    if any(doc_before_save.get(f) != doc.get(f) for f in ("sales_partner", "sales_invoice")):
+        remove_ledgers([doc.name])
+        index_ledgers([doc])
+
+    # Draft edits move points between partners or periods
+    if doc.docstatus < 2 and any(doc_before_save.get(f) != doc.get(f) for f in ("sales_partner", "date", "points")):
+        apply_ledger_totals([doc_before_save], sign=-1)
+        apply_ledger_totals([doc])
+
+
+def on_ledger_cancel(doc, method=None):
+    clear_ledger_count_cache(doc.sales_partner)
+    bump_partner_version(doc.sales_partner)
+    mark_partner_writes([doc.sales_partner])
+    apply_ledger_totals([doc], sign=-1)
+    queue_ledger_event([doc], "cancel")
+
+
+def on_ledger_trash(doc, method=None):
+    clear_ledger_count_cache(doc.sales_partner)
+    bump_partner_version(doc.sales_partner)
+    mark_partner_writes([doc.sales_partner])
+    remove_ledgers([doc.name])
+    # Cancelled rows were already taken out of the rollup
+    if doc.docstatus < 2:
+        apply_ledger_totals([doc], sign=-1)
+
+
+def on_ledger_rename(doc, method=None, old_name=None, new_name=None, merge=False):
+    remove_ledgers([old_name])
+    index_ledgers([doc])
+    bump_partner_version(doc.sales_partner)
+    mark_partner_writes([doc.sales_partner])
+
+
+# Same side effects as the doc_events above, for rows inserted without documents
+def after_bulk_insert(rows):
+    if not rows:
+        return
+
+    apply_ledger_totals(rows)
+    index_ledgers(rows)
+    for sales_partner in {row.sales_partner for row in rows}:
+        clear_ledger_count_cache(sales_partner)
+        bump_partner_version(sales_partner)
+    mark_partner_writes({row.sales_partner for row in rows})
+    queue_ledger_event(rows, "insert")
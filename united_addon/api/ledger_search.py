@@ -0,0 +1,120 @@
+import frappe
+from united_addon.api.ledger_archive import ARCHIVE_TABLE, LEDGER_TABLE, get_archive_cutoff
+
+
+# Trigram index over ledger name and sales_invoice so the transaction search
+# doesn't need a leading-wildcard LIKE scan of the partner's whole ledger
+
+SEARCH_TABLE = "__sales_partner_ledger_search"
+GRAM_SIZE = 3
+INSERT_CHUNK_SIZE = 1000
+# Grams intersected per search, and the row count past which a gram is too common to use
+SELECTIVE_GRAMS = 3
+GRAM_COUNT_CAP = 5000
+
+
+def ensure_search_table():
+    frappe.db.sql_ddl(f"""
+        CREATE TABLE IF NOT EXISTS `{SEARCH_TABLE}` (
+            `sales_partner` VARCHAR(140) NOT NULL,
+            `gram` VARCHAR({GRAM_SIZE}) NOT NULL,
+            `ledger` VARCHAR(140) NOT NULL,
+            PRIMARY KEY (`sales_partner`, `gram`, `ledger`),
+            KEY `ledger` (`ledger`)
+        ) ENGINE=InnoDB CHARACTER SET=utf8mb4 COLLATE=utf8mb4_bin
+    """)
+
+
+def get_grams(*values):
+    grams = set()
+    for value in values:
+        value = (value or "").lower()
+        grams.update(value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1))
+    return grams
+
+
+def index_ledgers(ledgers):
+    # ledgers: iterable of rows with name, sales_partner and sales_invoice
+    values = []
+    for ledger in ledgers:
+        for gram in get_grams(ledger.get("name"), ledger.get("sales_invoice")):
+            values.append((ledger.get("sales_partner"), gram, ledger.get("name")))
+
+    for start in range(0, len(values), INSERT_CHUNK_SIZE):
+        chunk = values[start:start + INSERT_CHUNK_SIZE]
+        frappe.db.sql(
+            f"INSERT IGNORE INTO `{SEARCH_TABLE}` (sales_partner, gram, ledger) VALUES "
+            + ", ".join(["(%s, %s, %s)"] * len(chunk)),
+            tuple(v for row in chunk for v in row),
+        )
+
+
+def remove_ledgers(names):
+    if names:
+        frappe.db.sql(f"DELETE FROM `{SEARCH_TABLE}` WHERE ledger IN %(names)s", {"names": tuple(names)})
+
+
+def get_search_condition(sales_partner, search_name, search_mode=None):
+    # Prefix fast path for invoice / ledger numbers: both columns are indexed left-to-right
+    if search_mode == "prefix":
+        search_param = f"{search_name}%"
+        return "(name LIKE %s OR sales_invoice LIKE %s)", [search_param, search_param]
+
+    search_param = f"%{search_name}%"
+    condition = "(name LIKE %s OR sales_invoice LIKE %s)"
+    grams = get_grams(search_name)
+    if not grams:
+        # Too short for a trigram, fall back to the plain scan
+        return condition, [search_param, search_param]
+
+    # Invoice numbers share grams like "inv" or "-20" with every row of the partner,
+    # so the candidates come from intersecting only the rarest few grams
+    selective_grams = get_selective_grams(sales_partner, grams)
+    if not selective_grams:
+        # Every gram is common, the term is not selective enough to beat the plain scan
+        return condition, [search_param, search_param]
+
+    joins = "".join(
+        f" JOIN `{SEARCH_TABLE}` g{i} ON g{i}.sales_partner = g0.sales_partner AND g{i}.gram = %s AND g{i}.ledger = g0.ledger"
+        for i in range(1, len(selective_grams))
+    )
+    return f"""name IN (
+            SELECT g0.ledger FROM `{SEARCH_TABLE}` g0{joins}
+            WHERE g0.sales_partner = %s AND g0.gram = %s
+        ) AND {condition}""", selective_grams[1:] + [sales_partner, selective_grams[0], search_param, search_param]
+
+
+def get_selective_grams(sales_partner, grams):
+    # Capped count per gram, each a short range read of the primary key, rarest first
+    grams = sorted(grams)
+    counts = frappe.db.sql(" UNION ALL ".join(
+        f"""(SELECT %s, COUNT(*) FROM (
+            SELECT 1 FROM `{SEARCH_TABLE}` WHERE sales_partner = %s AND gram = %s LIMIT %s
+        ) c{i})"""
+        for i in range(len(grams))
+    ), tuple(v for gram in grams for v in (gram, sales_partner, gram, GRAM_COUNT_CAP)))
+
+    counts = sorted(counts, key=lambda row: row[1])
+    if counts[0][1] >= GRAM_COUNT_CAP:
+        return []
+    return [gram for gram, _ in counts[:SELECTIVE_GRAMS]]
+
+
+def rebuild_search_index(batch_size=5000):
+    ensure_search_table()
+    frappe.db.sql(f"TRUNCATE `{SEARCH_TABLE}`")
+
+    # Archived rows stay searchable
+    tables = [LEDGER_TABLE, ARCHIVE_TABLE] if get_archive_cutoff() else [LEDGER_TABLE]
+    for table in tables:
+        last_name = ""
+        while True:
+            ledgers = frappe.db.sql(f"""
+                SELECT name, sales_partner, sales_invoice FROM `{table}`
+                WHERE name > %s ORDER BY name LIMIT %s
+            """, (last_name, batch_size), as_dict=1)
+            if not ledgers:
+                break
+            index_ledgers(ledgers)
+            frappe.db.commit()
+            last_name = ledgers[-1].name
@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+import math
+import time
+
+import frappe
+from frappe.utils.password import get_encryption_key
+
+
+# Sliding-window limits for auth.login, per submitted username and per client IP,
+# checked before any password work. Each window is a redis sorted set of attempt
+# timestamps, trimmed, appended to and counted in one pipelined round trip
+
+LOGIN_ATTEMPTS_PREFIX = "united_addon:login_attempts:"
+UNLINKED_PREFIX = "united_addon:login_unlinked:"
+# (attempts, seconds) per window, site config: united_addon_login_user_limit / united_addon_login_ip_limit.
+# Whole field teams log in from behind one carrier or office NAT in the morning, so the
+# IP window only stops floods; united_addon_login_throttle_exempt_ips skips it entirely
+USER_LIMIT = (10, 5 * 60)
+IP_LIMIT = (1000, 60)
+# Users that authenticated but are not linked to an employee / sales partner
+UNLINKED_CACHE_TTL = 60
+
+
+def get_limits(usr):
+    user_limit = frappe.conf.get("united_addon_login_user_limit") or USER_LIMIT
+    ip_limit = frappe.conf.get("united_addon_login_ip_limit") or IP_LIMIT
+    limits = [("user:" + usr, *user_limit)]
+    request_ip = frappe.local.request_ip
+    if request_ip and request_ip not in (frappe.conf.get("united_addon_login_throttle_exempt_ips") or []):
+        limits.append(("ip:" + request_ip, *ip_limit))
+    return limits
+
+
+def check_login_rate(usr):
+    # Returns the seconds to wait when a window is full, else None
+    now = time.time()
+    member = f"{now}:{frappe.generate_hash(length=6)}"
+    limits = get_limits(usr)
+
+    pipeline = frappe.cache.pipeline()
+    for scope, limit, window in limits:
+        key = frappe.cache.make_key(LOGIN_ATTEMPTS_PREFIX + scope)
+        pipeline.zremrangebyscore(key, 0, now - window)
+        pipeline.zadd(key, {member: now})
+        pipeline.zcard(key)
+        # The attempt that has to age out before the count drops below the limit
+        pipeline.zrange(key, -limit, -limit, withscores=True)
+        pipeline.expire(key, window)
+    results = pipeline.execute()
+
+    retry_after = None
+    for idx, (_, limit, window) in enumerate(limits):
+        count, oldest = results[idx * 5 + 2], results[idx * 5 + 3]
+        if count > limit and oldest:
+            wait = max(1, math.ceil(oldest[0][1] + window - now))
+            retry_after = max(retry_after or 0, wait)
+    return retry_after
+
+
+def get_credentials_digest(usr, pwd):
+    # Keyed with the site's encryption key, the cache never holds a plain password hash
+    return hmac.new(get_encryption_key().encode(), f"{usr}\0{pwd}".encode(), hashlib.sha256).hexdigest()
+
+
+def get_unlinked_error(usr, pwd):
+    # Only the exact credentials that authenticated get the cached answer, anyone else
+    # still goes through authenticate and learns nothing about the account
+    cached = frappe.cache.get_value(UNLINKED_PREFIX + usr)
+    if cached and hmac.compare_digest(cached["digest"], get_credentials_digest(usr, pwd)):
+        return cached["error"]
+    return None
+
+
+def set_unlinked_error(usr, pwd, error):
+    frappe.cache.set_value(
+        UNLINKED_PREFIX + usr,
+        {"digest": get_credentials_digest(usr, pwd), "error": error},
+        expires_in_sec=UNLINKED_CACHE_TTL,
+    )
+
+
+def clear_unlinked_error(users):
+    for user in users:
+        if user:
+            frappe.cache.delete_value(UNLINKED_PREFIX + user)
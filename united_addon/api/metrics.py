@@ -0,0 +1,160 @@
+import time
+
+import frappe
+from frappe.utils import cint, flt
+from werkzeug.wrappers import Response
+
+
+# Per-endpoint instrumentation for united_addon whitelisted methods, wired in
+# through before_request / after_request in hooks.py. Each request records wall
+# time, SQL count and time, cache hits/misses and response size; the result is
+# sent back as Server-Timing and folded into redis with one pipelined round trip
+
+METRICS_PREFIX = "united_addon:metrics:"
+METHODS_KEY = METRICS_PREFIX + "methods"
+SAMPLES_PER_METHOD = 1000
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def get_method_name(path):
+    # /api/method/<cmd> and /api/v2/method/<cmd>
+    _, _, method = (path or "").partition("/method/")
+    method = method.strip("/")
+    return method if method.startswith("united_addon.") else None
+
+
+def start_request_metrics():
+    request = getattr(frappe.local, "request", None)
+    method = get_method_name(request.path if request else None)
+    if not method:
+        return
+
+    frappe.local.united_addon_metrics = frappe._dict({
+        "method": method,
+        "start": time.perf_counter(),
+        "sql_count": 0,
+        "sql_time": 0.0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+    })
+    instrument_db(frappe.local.db)
+
+
+def instrument_db(db):
+    # Wraps this connection's sql() only, other requests and jobs are untouched
+    metrics = getattr(frappe.local, "united_addon_metrics", None)
+    if not metrics or db is None or getattr(db, "_united_addon_instrumented", False):
+        return
+
+    sql = db.sql
+
+    def timed_sql(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return sql(*args, **kwargs)
+        finally:
+            metrics.sql_count += 1
+            metrics.sql_time += time.perf_counter() - start
+
+    db.sql = timed_sql
+    db._united_addon_instrumented = True
+
+
+def record_cache(hit):
+    metrics = getattr(frappe.local, "united_addon_metrics", None)
+    if metrics:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def finish_request_metrics(response=None, request=None):
+    metrics = getattr(frappe.local, "united_addon_metrics", None)
+    if not metrics or response is None:
+        return
+    frappe.local.united_addon_metrics = None
+
+    duration = time.perf_counter() - metrics.start
+    # Streamed exports have no size until they are fully sent
+    size = -1 if response.is_streamed else len(response.get_data())
+
+    response.headers["Server-Timing"] = ", ".join([
+        f"app;dur={duration * 1000:.1f}",
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.sql_count} queries"',
+        f'cache;desc="{metrics.cache_hits} hits {metrics.cache_misses} misses"',
+    ])
+
+    try:
+        key = METRICS_PREFIX + metrics.method
+        pipeline = frappe.cache.pipeline()
+        pipeline.sadd(frappe.cache.make_key(METHODS_KEY), metrics.method)
+        pipeline.lpush(frappe.cache.make_key(key + ":samples"), round(duration, 6))
+        pipeline.ltrim(frappe.cache.make_key(key + ":samples"), 0, SAMPLES_PER_METHOD - 1)
+        counters = frappe.cache.make_key(key + ":counters")
+        pipeline.hincrby(counters, "requests", 1)
+        pipeline.hincrby(counters, "errors", 1 if response.status_code >= 500 else 0)
+        pipeline.hincrbyfloat(counters, "duration_seconds", duration)
+        pipeline.hincrby(counters, "sql_queries", metrics.sql_count)
+        pipeline.hincrbyfloat(counters, "sql_seconds", metrics.sql_time)
+        pipeline.hincrby(counters, "cache_hits", metrics.cache_hits)
+        pipeline.hincrby(counters, "cache_misses", metrics.cache_misses)
+        pipeline.hincrby(counters, "response_bytes", max(size, 0))
+        pipeline.execute()
+    except Exception:
+        # Metrics must never fail the request
+        pass
+
+
+def get_metrics_summary():
+    summary = {}
+    for method in sorted(m.decode() for m in frappe.cache.smembers(frappe.cache.make_key(METHODS_KEY))):
+        key = METRICS_PREFIX + method
+        samples = sorted(flt(s) for s in frappe.cache.lrange(frappe.cache.make_key(key + ":samples"), 0, -1))
+        counters = {k.decode(): v.decode() for k, v in frappe.cache.hgetall(frappe.cache.make_key(key + ":counters")).items()}
+        summary[method] = {
+            "quantiles": {q: samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0 for q in QUANTILES},
+            "requests": cint(counters.get("requests")),
+            "errors": cint(counters.get("errors")),
+            "duration_seconds": flt(counters.get("duration_seconds")),
+            "sql_queries": cint(counters.get("sql_queries")),
+            "sql_seconds": flt(counters.get("sql_seconds")),
+            "cache_hits": cint(counters.get("cache_hits")),
+            "cache_misses": cint(counters.get("cache_misses")),
+            "response_bytes": cint(counters.get("response_bytes")),
+        }
+    return summary
+
+
+#Metrics (Prometheus text format)
+@frappe.whitelist()
+def get_metrics():
+    frappe.only_for("System Manager")
+
+    lines = [
+        "# HELP united_addon_request_duration_seconds Wall time of united_addon API requests (last 1000 per method)",
+        "# TYPE united_addon_request_duration_seconds summary",
+    ]
+    counters = [
+        ("united_addon_sql_queries_total", "sql_queries", "SQL queries run by united_addon API requests"),
+        ("united_addon_sql_seconds_total", "sql_seconds", "Time spent in SQL by united_addon API requests"),
+        ("united_addon_cache_hits_total", "cache_hits", "united_addon cache hits"),
+        ("united_addon_cache_misses_total", "cache_misses", "united_addon cache misses"),
+        ("united_addon_response_bytes_total", "response_bytes", "Response bytes sent by united_addon API requests"),
+        ("united_addon_errors_total", "errors", "united_addon API responses with a 5xx status"),
+    ]
+
+    summary = get_metrics_summary()
+    for method, values in summary.items():
+        for quantile, value in values["quantiles"].items():
+            lines.append(f'united_addon_request_duration_seconds{{method="{method}",quantile="{quantile}"}} {value}')
+        lines.append(f'united_addon_request_duration_seconds_sum{{method="{method}"}} {values["duration_seconds"]}')
+        lines.append(f'united_addon_request_duration_seconds_count{{method="{method}"}} {values["requests"]}')
+
+    for metric, field, description in counters:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for method, values in summary.items():
+            lines.append(f'{metric}{{method="{method}"}} {values[field]}')
+
+    return Response("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
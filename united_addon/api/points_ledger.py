@@ -0,0 +1,163 @@
+import hashlib
+
+import frappe
+from frappe.utils import cstr, flt, getdate, now, nowdate
+from united_addon.api.utils import gen_response
+from united_addon.api.ledger_events import after_bulk_insert
+
+
+LEDGER_DOCTYPE = "Sales Partner Points Ledgers"
+MAX_BULK_ENTRIES = 5000
+INSERT_CHUNK_SIZE = 500
+
+
+#Bulk Points Ledger Ingestion
+@frappe.whitelist(allow_guest=False, methods="POST")
+def bulk_insert_points():
+    try:
+        frappe.has_permission(LEDGER_DOCTYPE, "create", throw=True)
+
+        input_data = frappe.request.get_json(silent=True) or frappe.local.form_dict
+        entries = input_data.get("entries")
+        if isinstance(entries, str):
+            entries = frappe.parse_json(entries)
+        if not isinstance(entries, list) or not entries:
+            return gen_response(400, "entries must be a non-empty list", {})
+        if len(entries) > MAX_BULK_ENTRIES:
+            return gen_response(400, f"At most {MAX_BULK_ENTRIES} entries per request", {})
+
+        results, rows = validate_entries(entries)
+        inserted = insert_entries(rows)
+
+        for row in rows:
+            result = results[row.idx]
+            result["name"] = row.name
+            result["status"] = "inserted" if row.name in inserted else "duplicate"
+
+        summary = {
+            "inserted": sum(1 for r in results if r["status"] == "inserted"),
+            "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+            "errors": sum(1 for r in results if r["status"] == "error"),
+            "results": results
+        }
+        return gen_response(200, "Points Ledger Entries Processed", summary)
+
+    except frappe.PermissionError:
+        return gen_response(403, "Not permitted to create points ledger entries", {})
+    except Exception as ex:
+        frappe.log_error(frappe.get_traceback(), "Bulk Points Ledger Error")
+        return gen_response(500, "Failed to process points ledger entries", str(ex))
+
+
+def validate_entries(entries):
+    # One pass over the batch, partners and invoices are resolved with IN queries
+    partners = {cstr(e.get("sales_partner")) for e in entries if isinstance(e, dict) and e.get("sales_partner")}
+    invoices = {cstr(e.get("sales_invoice")) for e in entries if isinstance(e, dict) and e.get("sales_invoice")}
+    existing_partners = set(frappe.get_all("Sales Partner", filters={"name": ["in", list(partners)]}, pluck="name")) if partners else set()
+    existing_invoices = set(frappe.get_all("Sales Invoice", filters={"name": ["in", list(invoices)]}, pluck="name")) if invoices else set()
+
+    results = []
+    rows = []
+    seen_keys = {}
+    for idx, entry in enumerate(entries):
+        result = {"idx": idx, "idempotency_key": None, "status": "error", "name": None, "error": None}
+        results.append(result)
+
+        if not isinstance(entry, dict):
+            result["error"] = "Entry must be an object"
+            continue
+
+        key = cstr(entry.get("idempotency_key")).strip()
+        result["idempotency_key"] = key
+        error = None
+        if not key or len(key) > 140:
+            error = "idempotency_key is required (max 140 characters)"
+        elif cstr(entry.get("sales_partner")) not in existing_partners:
+            error = "Sales Partner not found"
+        elif entry.get("sales_invoice") and cstr(entry.get("sales_invoice")) not in existing_invoices:
+            error = "Sales Invoice not found"
+        elif not flt(entry.get("points")):
+            error = "points must be a non-zero number"
+        else:
+            try:
+                date = getdate(entry.get("date") or nowdate())
+            except Exception:
+                error = "Invalid date"
+
+        if error:
+            result["error"] = error
+            continue
+
+        # Retries within the batch resolve to the first occurrence
+        name = get_ledger_name(key)
+        if key in seen_keys:
+            result.update({"status": "duplicate", "name": name})
+            continue
+        seen_keys[key] = idx
+
+        rows.append(frappe._dict({
+            "idx": idx,
+            "name": name,
+            "sales_partner": cstr(entry.get("sales_partner")),
+            "sales_invoice": cstr(entry.get("sales_invoice")) or None,
+            "points": flt(entry.get("points")),
+            "date": date,
+        }))
+
+    return results, rows
+
+
+def get_ledger_name(idempotency_key):
+    # The row name derives from the idempotency key, so a retried entry hits the primary key
+    return "SPPL-BULK-" + hashlib.sha1(idempotency_key.encode()).hexdigest()[:20]
+
+
+def insert_entries(rows):
+    if not rows:
+        return set()
+
+    timestamp = now()
+    user = frappe.session.user
+    docstatus = 1 if frappe.get_meta(LEDGER_DOCTYPE).is_submittable else 0
+    inserted = set()
+
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + INSERT_CHUNK_SIZE]
+        values = []
+        for row in chunk:
+            values.extend([row.name, timestamp, timestamp, user, user, docstatus,
+                           row.sales_partner, row.date, row.points, row.sales_invoice])
+
+        frappe.db.sql(f"""
+            INSERT IGNORE INTO `tab{LEDGER_DOCTYPE}`
+                (name, creation, modified, owner, modified_by, docstatus,
+                sales_partner, date, points, sales_invoice)
+            VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(chunk))}
+        """, tuple(values))
+
+        # Rows ignored as duplicates keep the creation of whoever inserted them first
+        inserted.update(frappe.db.sql_list(f"""
+            SELECT name FROM `tab{LEDGER_DOCTYPE}` WHERE name IN %(names)s AND creation = %(timestamp)s
+        """, {"names": tuple(row.name for row in chunk), "timestamp": timestamp}))
+
+    inserted_rows = [row for row in rows if row.name in inserted]
+    apply_earned_points(inserted_rows)
+    after_bulk_insert(inserted_rows)
+    return inserted
+
+
+def apply_earned_points(rows):
+    # Net custom_earned_points change per partner, one UPDATE for the whole batch
+    totals = {}
+    for row in rows:
+        totals[row.sales_partner] = totals.get(row.sales_partner, 0) + row.points
+    if not totals:
+        return
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(totals))
+    params = [v for item in totals.items() for v in item]
+    frappe.db.sql(f"""
+        UPDATE `tabSales Partner`
+        SET custom_earned_points = IFNULL(custom_earned_points, 0) + (CASE name {cases} END)
+        WHERE name IN %s
+    """, tuple(params + [tuple(totals)]))
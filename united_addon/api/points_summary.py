@@ -0,0 +1,120 @@
+import hashlib
+from collections import defaultdict
+
+import frappe
+from frappe.utils import flt, get_first_day, getdate, now, nowdate
+from united_addon.api.ledger_archive import ledger_source
+
+
+# Day and month credit/debit/net rollups of Sales Partner Points Ledgers,
+# kept in Sales Partner Points Summary by the ledger doc_events
+
+SUMMARY_DOCTYPE = "Sales Partner Points Summary"
+PERIOD_TYPES = ("Day", "Month")
+
+
+def get_period_start(period_type, date):
+    date = getdate(date)
+    return get_first_day(date) if period_type == "Month" else date
+
+
+def get_summary_name(sales_partner, period_type, period_start):
+    # Deterministic so the rebuild query (MD5 in SQL) produces the same names
+    key = "::".join([sales_partner, period_type, str(period_start)])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def update_points_summary(rows, sign=1):
+    # rows: iterable of dicts with sales_partner, date and points, sign=-1 reverses them
+    totals = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    for row in rows:
+        points = flt(row.get("points")) * sign
+        for period_type in PERIOD_TYPES:
+            total = totals[(row.get("sales_partner"), period_type, get_period_start(period_type, row.get("date")))]
+            if flt(row.get("points")) > 0:
+                total[0] += points
+            else:
+                total[1] -= points
+            total[2] += points
+            total[3] += sign
+
+    if not totals:
+        return
+
+    timestamp = now()
+    values = []
+    for (sales_partner, period_type, period_start), (credit, debit, net, count) in totals.items():
+        values.extend([
+            get_summary_name(sales_partner, period_type, period_start), timestamp, timestamp,
+            frappe.session.user, frappe.session.user,
+            sales_partner, period_type, period_start, credit, debit, net, count,
+        ])
+
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(totals))
+    frappe.db.sql(f"""
+        INSERT INTO `tab{SUMMARY_DOCTYPE}`
+            (name, creation, modified, modified_by, owner,
+            sales_partner, period_type, period_start, credit_points, debit_points, net_points, entry_count)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE
+            credit_points = credit_points + VALUES(credit_points),
+            debit_points = debit_points + VALUES(debit_points),
+            net_points = net_points + VALUES(net_points),
+            entry_count = entry_count + VALUES(entry_count),
+            modified = VALUES(modified)
+    """, tuple(values))
+
+
+def get_points_summary(sales_partner, date=None):
+    date = getdate(date or nowdate())
+    rows = frappe.db.sql(f"""
+        SELECT period_type, credit_points, debit_points, net_points
+        FROM `tab{SUMMARY_DOCTYPE}`
+        WHERE sales_partner = %s
+            AND ((period_type = 'Day' AND period_start = %s) OR (period_type = 'Month' AND period_start = %s))
+    """, (sales_partner, date, get_first_day(date)), as_dict=1)
+
+    summary = {
+        "today": {"credit": 0, "debit": 0, "net": 0},
+        "this_month": {"credit": 0, "debit": 0, "net": 0},
+    }
+    for row in rows:
+        key = "today" if row.period_type == "Day" else "this_month"
+        summary[key] = {"credit": row.credit_points, "debit": row.debit_points, "net": row.net_points}
+    return summary
+
+
+def rebuild_points_summary(sales_partners=None, chunk_size=200):
+    # Recompute the rollup from the ledger a chunk of partners at a time
+    if sales_partners is None:
+        sales_partners = frappe.get_all("Sales Partner", pluck="name", order_by="name")
+
+    timestamp = now()
+    for start in range(0, len(sales_partners), chunk_size):
+        chunk = tuple(sales_partners[start:start + chunk_size])
+
+        frappe.db.sql(f"DELETE FROM `tab{SUMMARY_DOCTYPE}` WHERE sales_partner IN %(chunk)s", {"chunk": chunk})
+        for period_type, period_expr in (("Day", "date"), ("Month", "DATE_FORMAT(date, '%%Y-%%m-01')")):
+            frappe.db.sql(f"""
+                INSERT INTO `tab{SUMMARY_DOCTYPE}`
+                    (name, creation, modified, modified_by, owner,
+                    sales_partner, period_type, period_start, credit_points, debit_points, net_points, entry_count)
+                SELECT
+                    MD5(CONCAT_WS('::', sales_partner, %(period_type)s, period_start)),
+                    %(timestamp)s, %(timestamp)s, %(user)s, %(user)s,
+                    sales_partner, %(period_type)s, period_start, credit, debit, net, entries
+                FROM (
+                    SELECT
+                        sales_partner,
+                        {period_expr} AS period_start,
+                        SUM(CASE WHEN points > 0 THEN points ELSE 0 END) AS credit,
+                        -SUM(CASE WHEN points > 0 THEN 0 ELSE points END) AS debit,
+                        SUM(points) AS net,
+                        COUNT(*) AS entries
+                    FROM {ledger_source()}
+                    WHERE sales_partner IN %(chunk)s AND docstatus < 2
+                    GROUP BY sales_partner, period_start
+                ) grouped
+            """, {"chunk": chunk, "period_type": period_type, "timestamp": timestamp, "user": frappe.session.user})
+
+        frappe.db.commit()
@@ -0,0 +1,67 @@
+import frappe
+from united_addon.api.sales_person import format_ledger
+
+
+# Push ledger changes to the partner's user instead of dashboard polling.
+# Changes are collected per partner during the request and published once
+# after commit, so a bulk posting sends one event per partner, not per row
+
+LEDGER_EVENT = "united_addon_points_update"
+MAX_EVENT_TRANSACTIONS = 20
+
+
+def queue_ledger_event(ledgers, action):
+    pending = getattr(frappe.local, "united_addon_pending_ledger_events", None)
+    if pending is None:
+        pending = frappe.local.united_addon_pending_ledger_events = {}
+        frappe.db.after_commit.add(publish_ledger_events)
+        # A rollback drops the after_commit callback, the queued rows must go with it
+        frappe.db.after_rollback.add(discard_ledger_events)
+
+    for ledger in ledgers:
+        event = pending.setdefault(ledger.get("sales_partner"), {"count": 0, "transactions": []})
+        event["count"] += 1
+        transaction = format_ledger(ledger)
+        transaction["action"] = action
+        event["transactions"].append(transaction)
+        # Bulk postings only carry the latest rows, the app syncs the rest
+        if len(event["transactions"]) > MAX_EVENT_TRANSACTIONS:
+            event["transactions"].pop(0)
+
+
+def discard_ledger_events():
+    frappe.local.united_addon_pending_ledger_events = None
+
+
+def publish_ledger_events():
+    pending = getattr(frappe.local, "united_addon_pending_ledger_events", None) or {}
+    frappe.local.united_addon_pending_ledger_events = None
+    if not pending:
+        return
+
+    sales_partners = list(pending)
+    balances = dict(frappe.get_all(
+        "Sales Partner", filters={"name": ["in", sales_partners]}, fields=["name", "custom_earned_points"], as_list=1
+    ))
+    users = get_partner_users(sales_partners)
+
+    for sales_partner, event in pending.items():
+        user = users.get(sales_partner)
+        if not user:
+            continue
+        frappe.publish_realtime(LEDGER_EVENT, {
+            "sales_partner": sales_partner,
+            "available_points": balances.get(sales_partner) or 0,
+            "count": event["count"],
+            "truncated": event["count"] > len(event["transactions"]),
+            "transactions": event["transactions"],
+        }, user=user)
+
+
+def get_partner_users(sales_partners):
+    return dict(frappe.db.sql("""
+        SELECT sp.name, emp.user_id
+        FROM `tabSales Partner` sp
+        INNER JOIN `tabEmployee` emp ON emp.name = sp.custom_employee
+        WHERE sp.name IN %(sales_partners)s AND emp.user_id IS NOT NULL
+    """, {"sales_partners": tuple(sales_partners)}))
@@ -0,0 +1,106 @@
+import time
+
+import frappe
+from frappe.utils import add_to_date, flt, now
+from united_addon.api.response_cache import bump_partner_version
+from united_addon.api.ledger_archive import get_archived_points
+from united_addon.api.replica import mark_partner_writes
+from united_addon.api.sales_person import get_sync_settle_seconds
+
+
+# Reconcile Sales Partner.custom_earned_points with SUM(points) of the ledger.
+# Runs from scheduler_events; incremental runs only recheck partners whose
+# ledger rows were modified since the previous run
+
+LEDGER_DOCTYPE = "Sales Partner Points Ledgers"
+WATERMARK_KEY = "united_addon_points_reconciled_upto"
+METRICS_KEY = "united_addon:reconcile:last_run"
+DRIFT_TOLERANCE = 0.001
+
+
+def reconcile_earned_points(full=False, chunk_size=500):
+    started = time.monotonic()
+    run_started_at = now()
+
+    since = None if full else frappe.db.get_global(WATERMARK_KEY)
+    if since:
+        sales_partners = frappe.db.sql_list(
+            f"SELECT DISTINCT sales_partner FROM `tab{LEDGER_DOCTYPE}` WHERE modified >= %s", (since,)
+        )
+    else:
+        sales_partners = frappe.get_all("Sales Partner", pluck="name", order_by="name")
+
+    metrics = {"checked": 0, "drifted": 0, "total_drift": 0.0, "max_drift": 0.0}
+    for start in range(0, len(sales_partners), chunk_size):
+        chunk = tuple(sales_partners[start:start + chunk_size])
+        drifted = reconcile_chunk(chunk)
+
+        metrics["checked"] += len(chunk)
+        metrics["drifted"] += len(drifted)
+        for drift in drifted.values():
+            metrics["total_drift"] += abs(drift)
+            metrics["max_drift"] = max(metrics["max_drift"], abs(drift))
+        frappe.db.commit()
+
+    # modified is stamped before commit: rows stamped just before this run may commit after
+    # its scan, so the next run starts a settle window earlier and rechecks them
+    frappe.db.set_global(
+        WATERMARK_KEY, add_to_date(run_started_at, seconds=-get_sync_settle_seconds(), as_string=True, as_datetime=True)
+    )
+    frappe.db.commit()
+
+    metrics.update({
+        "full": bool(full or not since),
+        "since": since,
+        "finished_at": now(),
+        "duration_seconds": round(time.monotonic() - started, 3),
+    })
+    frappe.cache.set_value(METRICS_KEY, metrics)
+    frappe.logger("united_addon").info({"event": "points_reconciliation", **metrics})
+    return metrics
+
+
+def reconcile_all_earned_points():
+    # Weekly full pass also catches deleted ledger rows, which leave no modified trace
+    return reconcile_earned_points(full=True)
+
+
+def reconcile_chunk(sales_partners):
+    # One grouped aggregate for the whole chunk, then one CASE update for the drifted partners.
+    # The balances are locked first: a concurrent earn or bulk insert waits for this chunk's
+    # commit instead of being overwritten, and its uncommitted ledger rows are left out of
+    # the sum below, so its own balance update still applies on top.
+    # The read snapshot is taken by the first plain SELECT of a transaction, so start a new
+    # one: the sum then sees every ledger row committed before the locks were granted
+    frappe.db.commit()
+    balances = dict(frappe.db.sql("""
+        SELECT name, IFNULL(custom_earned_points, 0) FROM `tabSales Partner`
+        WHERE name IN %(sales_partners)s
+        FOR UPDATE
+    """, {"sales_partners": sales_partners}))
+    ledger_totals = dict(frappe.db.sql(f"""
+        SELECT sales_partner, SUM(points) FROM `tab{LEDGER_DOCTYPE}`
+        WHERE sales_partner IN %(sales_partners)s AND docstatus < 2
+        GROUP BY sales_partner
+    """, {"sales_partners": sales_partners}))
+
+    # Archived fiscal periods are carried by one summary row per partner
+    archived_points = get_archived_points(sales_partners)
+    expected = {sp: flt(ledger_totals.get(sp)) + flt(archived_points.get(sp)) for sp in balances}
+    drifted = {sp: expected[sp] - flt(balance) for sp, balance in balances.items()
+               if abs(expected[sp] - flt(balance)) > DRIFT_TOLERANCE}
+    if not drifted:
+        return drifted
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(drifted))
+    params = [v for sp in drifted for v in (sp, expected[sp])]
+    frappe.db.sql(f"""
+        UPDATE `tabSales Partner`
+        SET custom_earned_points = CASE name {cases} END
+        WHERE name IN %s
+    """, tuple(params + [tuple(drifted)]))
+
+    for sales_partner in drifted:
+        bump_partner_version(sales_partner)
+    mark_partner_writes(drifted)
+    return drifted
@@ -0,0 +1,87 @@
+import functools
+import time
+
+import frappe
+from united_addon.api.identity import get_identity
+from united_addon.api.metrics import instrument_db
+
+
+# Read endpoints run on the read replica when the site has one (read_from_replica
+# and replica_host in site config), like frappe.read_only. Partners whose ledger
+# or balance was written in the last few seconds stay on the primary so they
+# always see their own writes despite replication lag
+
+LAST_WRITE_PREFIX = "united_addon:partner_last_write:"
+# Seconds a partner stays on the primary after a write (site config: united_addon_replica_lag_window)
+REPLICA_LAG_WINDOW = 10
+
+
+def get_lag_window():
+    return frappe.conf.get("united_addon_replica_lag_window") or REPLICA_LAG_WINDOW
+
+
+def mark_partner_writes(sales_partners):
+    # Collected during the request, stamped once the write is visible on the primary
+    pending = getattr(frappe.local, "united_addon_pending_partner_writes", None)
+    if pending is None:
+        pending = frappe.local.united_addon_pending_partner_writes = set()
+        frappe.db.after_commit.add(flush_partner_writes)
+        frappe.db.after_rollback.add(discard_partner_writes)
+    pending.update(sp for sp in sales_partners if sp)
+
+
+def discard_partner_writes():
+    # Rolled back writes never reached the replica, and after_commit was reset with them
+    frappe.local.united_addon_pending_partner_writes = None
+
+
+def flush_partner_writes():
+    pending = getattr(frappe.local, "united_addon_pending_partner_writes", None) or set()
+    frappe.local.united_addon_pending_partner_writes = None
+    if not pending:
+        return
+
+    window = get_lag_window()
+    timestamp = time.time()
+    pipeline = frappe.cache.pipeline()
+    for sales_partner in pending:
+        pipeline.set(frappe.cache.make_key(LAST_WRITE_PREFIX + sales_partner), timestamp, ex=window)
+    pipeline.execute()
+
+
+def is_recent_writer(sales_partner):
+    last_write = frappe.cache.get(frappe.cache.make_key(LAST_WRITE_PREFIX + sales_partner))
+    return bool(last_write) and time.time() - float(last_write) < get_lag_window()
+
+
+def read_from_replica(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not frappe.conf.read_from_replica:
+            return fn(*args, **kwargs)
+
+        identity = get_identity()
+        if identity.sales_partner and is_recent_writer(identity.sales_partner):
+            return fn(*args, **kwargs)
+
+        try:
+            switched = frappe.connect_replica()
+        except Exception:
+            # An unreachable replica must not take the endpoint down
+            frappe.log_error(frappe.get_traceback(), "Read Replica Connection Error")
+            return fn(*args, **kwargs)
+
+        instrument_db(frappe.local.db)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if switched and getattr(frappe.local, "primary_db", None):
+                frappe.local.db.close()
+                frappe.local.db = frappe.local.primary_db
+
+    return wrapper
+
+
+# doc_events handler for Sales Partner
+def on_sales_partner_update(doc, method=None):
+    mark_partner_writes([doc.name])
@@ -0,0 +1,64 @@
+import hashlib
+
+import frappe
+from werkzeug.wrappers import Response
+from united_addon.api.utils import set_response_header, get_response_shape
+from united_addon.api.metrics import record_cache
+
+
+# Per-partner version counter, bumped by the ledger and Sales Partner doc_events.
+# Responses are cached under an ETag built from the version, so a bump makes
+# every cached payload of that partner unreachable without deleting anything
+
+VERSION_PREFIX = "united_addon:partner_version:"
+RESPONSE_PREFIX = "united_addon:response:"
+RESPONSE_CACHE_TTL = 10 * 60
+
+
+def get_partner_version(sales_partner):
+    return int(frappe.cache.get(frappe.cache.make_key(VERSION_PREFIX + sales_partner)) or 0)
+
+
+def bump_partner_version(sales_partner):
+    key = frappe.cache.make_key(VERSION_PREFIX + sales_partner)
+    frappe.cache.incr(key)
+    # Bump again once the write is visible, so a request that read the old rows
+    # in between can't leave them cached under the new version
+    frappe.db.after_commit.add(lambda: frappe.cache.incr(key))
+
+
+def get_etag(sales_partner, endpoint, params=None):
+    version = get_partner_version(sales_partner)
+    # Projected and compact responses are different representations of the same data
+    shape = get_response_shape()
+    digest = hashlib.md5(
+        frappe.as_json([sales_partner, version, endpoint, params, shape], indent=None).encode()
+    ).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def is_not_modified(etag):
+    if_none_match = frappe.get_request_header("If-None-Match") or ""
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+def not_modified_response(etag):
+    return Response(status=304, headers={"ETag": etag})
+
+
+def get_cached_response(etag):
+    data = frappe.cache.get_value(RESPONSE_PREFIX + etag)
+    record_cache(data is not None)
+    if data is not None:
+        set_response_header("ETag", etag)
+    return data
+
+
+def set_cached_response(etag, data):
+    frappe.cache.set_value(RESPONSE_PREFIX + etag, data, expires_in_sec=RESPONSE_CACHE_TTL)
+    set_response_header("ETag", etag)
+
+
+# doc_events handler for Sales Partner
+def on_sales_partner_update(doc, method=None):
+    bump_partner_version(doc.name)
@@ -1,93 +1,190 @@
 import frappe
-from united_addon.api.utils import gen_response
+from united_addon.api.utils import gen_response, encode_cursor, decode_cursor
+from united_addon.api.identity import get_identity, get_identity_error
+from united_addon.api.points_summary import get_points_summary
+from united_addon.api.ledger_search import get_search_condition
+from united_addon.api.ledger_archive import fetch_ledger_page, fetch_recent_ledgers, count_ledgers
+from united_addon.api.leaderboard import get_partner_rank
+from united_addon.api.metrics import record_cache
+from united_addon.api.replica import read_from_replica
+from united_addon.api.response_cache import (
+    get_etag, is_not_modified, not_modified_response, get_cached_response, set_cached_response
+)
 from datetime import datetime, timedelta
-from frappe.utils import flt
+from frappe.utils import add_to_date, cint, flt, get_first_day, now_datetime, nowdate
+from werkzeug.wrappers import Response
+import csv
+import io
 
 
+# Server-side cap so a single request can't pull the whole ledger
+MAX_TRANSACTION_LIMIT = 100
+
+# include_total counts stop here and report an estimate
+LEDGER_COUNT_CAP = 10000
+LEDGER_COUNT_CACHE_PREFIX = "united_addon:ledger_count:"
+# Backstop for a count cached from rows that changed without a doc_event
+LEDGER_COUNT_CACHE_TTL = 10 * 60
+
+# get_transaction pages served from the response cache
+CACHED_TRANSACTION_PAGES = 3
+
+# Multi-partner dashboard caps
+MAX_DASHBOARD_PARTNERS = 500
+MAX_PARTNER_TRANSACTIONS = 20
+
+# Delta sync page size cap
+MAX_SYNC_LIMIT = 500
+# Seconds a ledger change must be old before sync returns it (site config: united_addon_sync_settle_seconds)
+SYNC_SETTLE_SECONDS = 60
+
+# Streaming export: rows read per keyset batch, and format -> (content type, extension)
+EXPORT_BATCH_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
 
 #User Dashboard
 @frappe.whitelist()
-def get_dashboard_data():
+@read_from_replica
+def get_dashboard_data(include_rank=0):
     try:
-        # Get current user
-        current_user = frappe.session.user
+        # Step 1 & 2: Resolve user -> employee -> sales partner (cached)
+        identity = get_identity()
+        identity_error = get_identity_error(identity)
+        if identity_error:
+            return gen_response(400, identity_error, {})
         
-        # Step 1: Check active user and link to employee
-        user_doc = frappe.get_doc("User", current_user)
-        if not user_doc.enabled:
-            return gen_response(400, "User is not active", {})
+        sales_partner = identity.sales_partner
         
-        # Fetch employee using sql to avoid as_dict issue
-        employee_data = frappe.db.sql("""
-            SELECT name, employee_name FROM `tabEmployee` 
-            WHERE user_id = %s LIMIT 1
-        """, (current_user,), as_dict=1)
-        if not employee_data:
-            return gen_response(400, "No active employee linked to user", {})
+        # Monthly rank from the redis leaderboard, part of the ETag since other partners move it
+        rank = get_partner_rank(sales_partner) if cint(include_rank) else None
         
-        employee = employee_data[0]
+        # Unchanged since the client's last pull: 304, or the cached payload for other clients
+        etag = get_etag(sales_partner, "dashboard", [nowdate(), rank])
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        response_data = get_cached_response(etag)
+        if response_data is not None:
+            return gen_response(200, "Dashboard Data Fetched Successfully", response_data, row_keys=["recent_transactions"])
         
-        # Step 2: Get Sales Partner linked to employee (assume Sales Partner has 'employee' field)
-        sales_partner_data = frappe.db.sql("""
-            SELECT name FROM `tabSales Partner` 
-            WHERE custom_employee = %s LIMIT 1
-        """, (employee.name,), as_dict=1)
-        if not sales_partner_data:
-            return gen_response(400, "No Sales Partner linked to employee", {})
-        
-        sales_partner = sales_partner_data[0].name
-        
-        sales_partner_doc = frappe.get_doc("Sales Partner", sales_partner)
-        custom_earned_points = sales_partner_doc.custom_earned_points or 0
+        custom_earned_points = frappe.db.get_value("Sales Partner", sales_partner, "custom_earned_points") or 0
         
         # Step 3 & 4: Fetch last 10 ledger transactions for Sales Partner
         # Based on doctype structure: sales_partner, points (positive for credit, negative for debit?), date, sales_invoice (as narration)
-        ledgers_data = frappe.db.sql("""
-            SELECT name, date, points, sales_invoice FROM `tabSales Partner Points Ledgers`
-            WHERE sales_partner = %s 
-            ORDER BY date DESC 
-            LIMIT 10
-        """, (sales_partner,), as_dict=1)
+        # (reaches into the archive only when the hot ledger has fewer than 10 rows)
+        ledgers_data = fetch_ledger_page("sales_partner = %s", [sales_partner], 10)
         
         # Format ledgers: points as is (+ for credit, - for debit)
-        formatted_ledgers = []
-        for ledger in ledgers_data:
-            name = ledger.name
-            amount = ledger.points or 0
-            narration = ledger.sales_invoice or ""
-            ledger_type = "credit" if amount > 0 else "debit"
-            formatted_ledgers.append({
-                "transaction_id":name,
-                "date": ledger.date,
-                "sales_invoice": narration,
-                "amount": amount,
-                "type": ledger_type
-            })
+        formatted_ledgers = [format_ledger(ledger) for ledger in ledgers_data]
+        
+        # Step 5: Today / this month credit, debit and net from the rollup
+        points_summary = get_points_summary(sales_partner)
         
         # Prepare response data
         response_data = {
             "sales_partner": sales_partner,
             "available_points": custom_earned_points,
+            "points_summary": points_summary,
             "recent_transactions": formatted_ledgers
         }
+        if rank:
+            response_data["rank"] = rank
+        set_cached_response(etag, response_data)
         
-        return gen_response(200, "Dashboard Data Fetched Successfully", response_data)
+        return gen_response(200, "Dashboard Data Fetched Successfully", response_data, row_keys=["recent_transactions"])
     
     except Exception as ex:
         frappe.log_error(frappe.get_traceback(), "User Dashboard Error")
         return gen_response(500, "Failed to fetch user dashboard data", str(ex))
 
 
+#Partners Dashboard (managers / regions)
+@frappe.whitelist(allow_guest=False, methods="POST")
+@read_from_replica
+def get_partners_dashboard():
+    try:
+        input_data = frappe.request.get_json(silent=True) or frappe.local.form_dict
+        sales_partners = input_data.get('sales_partners') or []
+        territory = (input_data.get('territory') or '').strip()
+        department = (input_data.get('department') or '').strip()
+        transactions_limit = min(max(1, cint(input_data.get('limit')) or 5), MAX_PARTNER_TRANSACTIONS)
+        
+        if not (sales_partners or territory or department):
+            return gen_response(400, "Provide sales_partners, territory or department", {})
+        
+        # get_list applies the caller's Sales Partner permissions and user permissions
+        filters = {}
+        if sales_partners:
+            filters["name"] = ["in", sales_partners]
+        if territory:
+            filters["territory"] = ["descendants of (inclusive)", territory]
+        if department:
+            filters["custom_employee"] = ["in", frappe.get_list("Employee", filters={"department": department}, pluck="name") or [""]]
+        
+        partners = frappe.get_list(
+            "Sales Partner",
+            filters=filters,
+            fields=["name", "partner_name", "partner_type", "territory", "custom_earned_points"],
+            order_by="name",
+            limit_page_length=MAX_DASHBOARD_PARTNERS
+        )
+        if not partners:
+            return gen_response(200, "Partners Dashboard Fetched Successfully", {"partners": []})
+        
+        partner_names = tuple(p.name for p in partners)
+        
+        # Last N rows per partner in one windowed query, continued into the archive
+        # for partners with fewer recent rows, like get_dashboard_data
+        ledgers_data = fetch_recent_ledgers(partner_names, transactions_limit)
+        
+        # This month's totals from the rollup in one query
+        month_totals = {row.sales_partner: row for row in frappe.db.sql("""
+            SELECT sales_partner, credit_points, debit_points, net_points
+            FROM `tabSales Partner Points Summary`
+            WHERE sales_partner IN %(partners)s AND period_type = 'Month' AND period_start = %(month)s
+        """, {"partners": partner_names, "month": get_first_day(nowdate())}, as_dict=1)}
+        
+        transactions = {}
+        for ledger in ledgers_data:
+            transactions.setdefault(ledger.sales_partner, []).append(format_ledger(ledger))
+        
+        response_data = {"partners": []}
+        for partner in partners:
+            month = month_totals.get(partner.name)
+            response_data["partners"].append({
+                "sales_partner": partner.name,
+                "partner_name": partner.partner_name,
+                "partner_type": partner.partner_type or "",
+                "territory": partner.territory or "",
+                "available_points": partner.custom_earned_points or 0,
+                "this_month": {
+                    "credit": month.credit_points if month else 0,
+                    "debit": month.debit_points if month else 0,
+                    "net": month.net_points if month else 0
+                },
+                "recent_transactions": transactions.get(partner.name, [])
+            })
+        
+        return gen_response(200, "Partners Dashboard Fetched Successfully", response_data)
+    
+    except frappe.PermissionError:
+        return gen_response(403, "Not permitted to view these sales partners", {})
+    except Exception as ex:
+        frappe.log_error(frappe.get_traceback(), "Partners Dashboard Error")
+        return gen_response(500, "Failed to fetch partners dashboard data", str(ex))
+
+
 #Get Transaction
 @frappe.whitelist(allow_guest=False, methods="POST")
+@read_from_replica
 def get_transaction():
     try:
         # Get input from JSON request
         input_data = frappe.request.json or {}
-        from_date = input_data.get('from_date', '').strip()
-        to_date = input_data.get('to_date', '').strip()
-        search_name = input_data.get('name', '').strip()
-        trans_type = input_data.get('type', '').strip().lower()
+        filters = get_transaction_filters(input_data)
         
         # Safe int conversion for pagination
         def safe_int(value, default):
@@ -99,124 +196,360 @@ def get_transaction():
             return default
         
         page = max(1, safe_int(input_data.get('page'), 1))
-        limit = max(1, safe_int(input_data.get('limit'), 25))
-        
-        # Get current user
-        current_user = frappe.session.user
-        
-        # Step 1: Check active user and link to employee
-        user_doc = frappe.get_doc("User", current_user)
-        if not user_doc.enabled:
-            return gen_response(400, "User is not active", {})
-        
-        # Fetch employee using sql
-        employee_data = frappe.db.sql("""
-            SELECT name, employee_name FROM `tabEmployee` 
-            WHERE user_id = %s LIMIT 1
-        """, (current_user,), as_dict=1)
-        if not employee_data:
-            return gen_response(400, "No active employee linked to user", {})
-        
-        employee = employee_data[0]
-        
-        # Step 2: Get Sales Partner linked to employee (assume Sales Partner has 'employee' field)
-        sales_partner_data = frappe.db.sql("""
-            SELECT name FROM `tabSales Partner` 
-            WHERE custom_employee = %s LIMIT 1
-        """, (employee.name,), as_dict=1)
-        if not sales_partner_data:
-            return gen_response(400, "No Sales Partner linked to employee", {})
-        
-        sales_partner = sales_partner_data[0].name
-        
-        # Build dynamic query for count
-        count_query = """
-            SELECT COUNT(*) as total FROM `tabSales Partner Points Ledgers`
-            WHERE sales_partner = %s
-        """
-        count_params = [sales_partner]
-        
-        # Date filter: if both provided, use BETWEEN; else no date filter
-        if from_date and to_date:
-            count_query += " AND date BETWEEN %s AND %s"
-            count_params.extend([from_date, to_date])
-        
-        # Type filter: credit (points > 0), debit (points < 0)
-        if trans_type == 'credit':
-            count_query += " AND points > 0"
-        elif trans_type == 'debit':
-            count_query += " AND points < 0"
-        
-        # Name search filter: LIKE on name OR sales_invoice
-        if search_name:
-            count_query += " AND (name LIKE %s OR sales_invoice LIKE %s)"
-            search_param = f"%{search_name}%"
-            count_params.extend([search_param, search_param])
-        
-        # Execute count query
-        total_result = frappe.db.sql(count_query, tuple(count_params), as_dict=1)
-        total_count = total_result[0].total if total_result else 0
-        
-        # Build dynamic query for data
-        query = """
-            SELECT name, date, points, sales_invoice FROM `tabSales Partner Points Ledgers`
-            WHERE sales_partner = %s
-        """
-        params = [sales_partner]
-        
-        # Date filter: if both provided, use BETWEEN; else no date filter
-        if from_date and to_date:
-            query += " AND date BETWEEN %s AND %s"
-            params.extend([from_date, to_date])
-        
-        # Type filter: credit (points > 0), debit (points < 0)
-        if trans_type == 'credit':
-            query += " AND points > 0"
-        elif trans_type == 'debit':
-            query += " AND points < 0"
-        
-        # Name search filter: LIKE on name OR sales_invoice
-        if search_name:
-            query += " AND (name LIKE %s OR sales_invoice LIKE %s)"
-            search_param = f"%{search_name}%"
-            params.extend([search_param, search_param])
-        
-        # Order by date DESC
-        query += " ORDER BY date DESC LIMIT %s OFFSET %s"
-        offset = (page - 1) * limit
-        params.extend([limit, offset])
-        
-        # Execute query
-        ledgers_data = frappe.db.sql(query, tuple(params), as_dict=1)
+        limit = min(max(1, safe_int(input_data.get('limit'), 25)), MAX_TRANSACTION_LIMIT)
+        
+        # Cursor mode: seek past the last (date, name) of the previous page instead of OFFSET
+        cursor = (input_data.get('cursor') or '').strip()
+        if cursor:
+            cursor = decode_cursor(cursor)
+            if not cursor or not is_valid_date(cursor[0]):
+                return gen_response(400, "Invalid cursor", {})
+        
+        # Step 1 & 2: Resolve user -> employee -> sales partner (cached)
+        identity = get_identity()
+        identity_error = get_identity_error(identity)
+        if identity_error:
+            return gen_response(400, identity_error, {})
+        
+        sales_partner = identity.sales_partner
+        
+        # The first pages are what pull-to-refresh asks for, cache those per partner version
+        etag = None
+        if not cursor and page <= CACHED_TRANSACTION_PAGES:
+            etag = get_etag(sales_partner, "transactions", [filters, page, limit, cint(input_data.get('include_total'))])
+            if is_not_modified(etag):
+                return not_modified_response(etag)
+            response_data = get_cached_response(etag)
+            if response_data is not None:
+                return gen_response(200, "Transaction Data Fetched Successfully", response_data, row_keys=["transactions"])
+        
+        conditions, params = get_ledger_conditions(sales_partner, filters)
+        
+        # Optional total, served from cache and capped when the filtered set is large
+        total = get_ledger_count(sales_partner, filters) if cint(input_data.get('include_total')) else None
+        
+        # Order by date DESC, name breaks ties so pages never skip or repeat rows
+        # Fetch one extra row to know whether another page exists
+        # The archive is only queried when the range or page goes past the hot ledger
+        ledgers_data = fetch_ledger_page(
+            conditions, params, limit + 1,
+            offset=0 if cursor else (page - 1) * limit,
+            cursor=cursor,
+            from_date=get_range_start(filters)
+        )
+        has_more = len(ledgers_data) > limit
+        ledgers_data = ledgers_data[:limit]
         
         # Format ledgers
-        formatted_ledgers = []
-        for ledger in ledgers_data:
-            amount = ledger.points or 0
-            narration = ledger.sales_invoice or ""
-            ledger_type = "credit" if amount > 0 else "debit"
-            formatted_ledgers.append({
-                "transaction_id": ledger.name,
-                "date": ledger.date,
-                "amount": amount,
-                "sales_invoice": narration,
-                "type": ledger_type
+        formatted_ledgers = [format_ledger(ledger) for ledger in ledgers_data]
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(ledgers_data[-1].date, ledgers_data[-1].name)
+        
+        pagination = {
+            "page": page,
+            "limit": limit,
+            "has_more": has_more
+        }
+        if total:
+            pagination.update({
+                "total": total.count,
+                "total_exact": total.exact,
+                "total_pages": (total.count + limit - 1) // limit
             })
         
         # Prepare response data
         response_data = {
             "sales_partner": sales_partner,
-            "transactions": formatted_ledgers
-            # "pagination": {
-            #     "page": page,
-            #     "limit": limit,
-            #     "total": total_count,
-            #     "total_pages": (total_count + limit - 1) // limit if limit > 0 else 0
-            # }
+            "transactions": formatted_ledgers,
+            "next_cursor": next_cursor,
+            "pagination": pagination
         }
+        if etag:
+            set_cached_response(etag, response_data)
         
-        return gen_response(200, "Transaction Data Fetched Successfully", response_data)
+        return gen_response(200, "Transaction Data Fetched Successfully", response_data, row_keys=["transactions"])
     
     except Exception as ex:
         frappe.log_error(frappe.get_traceback(), "Transaction Fetch Error")
-        return gen_response(500, "Failed to fetch transaction data", str(ex))
\ No newline at end of file
+        return gen_response(500, "Failed to fetch transaction data", str(ex))
+
+
+#Sync Transactions
+@frappe.whitelist(allow_guest=False, methods=["GET", "POST"])
+def sync_transactions():
+    try:
+        # Only rows inserted, amended or cancelled after the (modified, name) watermark
+        input_data = frappe.request.get_json(silent=True) or frappe.local.form_dict
+        since = (input_data.get('since') or '').strip()
+        limit = min(max(1, cint(input_data.get('limit')) or 200), MAX_SYNC_LIMIT)
+        
+        watermark = None
+        if since:
+            watermark = decode_cursor(since)
+            if not watermark:
+                return gen_response(400, "Invalid watermark", {})
+        
+        identity = get_identity()
+        identity_error = get_identity_error(identity)
+        if identity_error:
+            return gen_response(400, identity_error, {})
+        
+        sales_partner = identity.sales_partner
+        
+        amended_from = ", amended_from" if frappe.get_meta("Sales Partner Points Ledgers").has_field("amended_from") else ""
+        query = f"""
+            SELECT name, date, points, sales_invoice, docstatus, modified{amended_from}
+            FROM `tabSales Partner Points Ledgers`
+            WHERE sales_partner = %s
+        """
+        # modified is stamped before commit, so rows younger than the settle window may still
+        # be joined by rows of an open transaction with an older modified; they wait for the next sync
+        settled_before = add_to_date(now_datetime(), seconds=-get_sync_settle_seconds())
+        query += " AND modified < %s"
+        params = [sales_partner, settled_before]
+        if watermark:
+            query += " AND (modified > %s OR (modified = %s AND name > %s))"
+            params.extend([watermark[0], watermark[0], watermark[1]])
+        query += " ORDER BY modified, name LIMIT %s"
+        params.append(limit + 1)
+        
+        ledgers_data = frappe.db.sql(query, tuple(params), as_dict=1)
+        has_more = len(ledgers_data) > limit
+        ledgers_data = ledgers_data[:limit]
+        
+        changes = []
+        for ledger in ledgers_data:
+            row = format_ledger(ledger)
+            row["status"] = "cancelled" if ledger.docstatus == 2 else "active"
+            if amended_from:
+                row["amended_from"] = ledger.amended_from
+            changes.append(row)
+        
+        # Nothing new keeps the client's watermark
+        next_watermark = since or None
+        if ledgers_data:
+            next_watermark = encode_cursor(ledgers_data[-1].modified, ledgers_data[-1].name)
+        
+        response_data = {
+            "sales_partner": sales_partner,
+            "available_points": frappe.db.get_value("Sales Partner", sales_partner, "custom_earned_points") or 0,
+            "transactions": changes,
+            "watermark": next_watermark,
+            "has_more": has_more
+        }
+        
+        return gen_response(200, "Transactions Synced Successfully", response_data, row_keys=["transactions"])
+    
+    except Exception as ex:
+        frappe.log_error(frappe.get_traceback(), "Transaction Sync Error")
+        return gen_response(500, "Failed to sync transaction data", str(ex))
+
+
+#Export Transactions
+@frappe.whitelist(allow_guest=False, methods=["GET", "POST"])
+def export_transactions():
+    try:
+        # Same filters as get_transaction, from a JSON body or query string
+        input_data = frappe.request.get_json(silent=True) or frappe.local.form_dict
+        filters = get_transaction_filters(input_data)
+        export_format = (input_data.get('format') or 'csv').strip().lower()
+        if export_format not in EXPORT_FORMATS:
+            return gen_response(400, "Unsupported export format", {})
+        
+        identity = get_identity()
+        identity_error = get_identity_error(identity)
+        if identity_error:
+            return gen_response(400, identity_error, {})
+        
+        sales_partner = identity.sales_partner
+        
+        # Large histories are written to a file by a background job
+        if cint(input_data.get('background')) or not get_ledger_count(sales_partner, filters).exact:
+            job = frappe.enqueue(
+                "united_addon.api.sales_person.build_transaction_export",
+                queue="long",
+                timeout=3600,
+                sales_partner=sales_partner,
+                filters=filters,
+                export_format=export_format,
+            )
+            return gen_response(202, "Export queued, you will be notified when the file is ready", {
+                "job_id": job.id if job else None
+            })
+        
+        content_type, extension = EXPORT_FORMATS[export_format]
+        filename = f"transactions-{frappe.scrub(sales_partner)}-{nowdate()}.{extension}"
+        return Response(
+            iter_export_chunks(sales_partner, filters, export_format),
+            content_type=content_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            direct_passthrough=True,
+        )
+    
+    except Exception as ex:
+        frappe.log_error(frappe.get_traceback(), "Transaction Export Error")
+        return gen_response(500, "Failed to export transaction data", str(ex))
+
+
+def build_transaction_export(sales_partner, filters, export_format):
+    content_type, extension = EXPORT_FORMATS[export_format]
+    file_name = f"transactions-{frappe.scrub(sales_partner)}-{frappe.generate_hash(length=8)}.{extension}"
+    
+    with open(frappe.get_site_path("private", "files", file_name), "wb") as f:
+        for chunk in iter_export_chunks(sales_partner, filters, export_format, close_db=False):
+            f.write(chunk)
+    
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": f"/private/files/{file_name}",
+        "is_private": 1,
+        "attached_to_doctype": "Sales Partner",
+        "attached_to_name": sales_partner,
+    }).insert(ignore_permissions=True)
+    frappe.db.commit()
+    
+    frappe.publish_realtime("united_addon_export_ready", {
+        "file_url": file_doc.file_url,
+        "file_name": file_name,
+    }, user=frappe.session.user)
+    return file_doc.file_url
+
+
+def iter_export_chunks(sales_partner, filters, export_format, close_db=True):
+    # One serialized chunk per keyset batch, memory stays flat however long the history is
+    try:
+        if export_format == "csv":
+            yield b"transaction_id,date,amount,sales_invoice,type\n"
+        
+        for ledgers in iter_ledger_batches(sales_partner, filters):
+            buffer = io.StringIO()
+            if export_format == "csv":
+                writer = csv.writer(buffer, lineterminator="\n")
+                for ledger in ledgers:
+                    row = format_ledger(ledger)
+                    writer.writerow([row["transaction_id"], row["date"], row["amount"], row["sales_invoice"], row["type"]])
+            else:
+                for ledger in ledgers:
+                    buffer.write(frappe.as_json(format_ledger(ledger), indent=None))
+                    buffer.write("\n")
+            # Bytes: direct_passthrough hands the chunks to the WSGI server unencoded
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        # Streamed responses are iterated after the request closed its connection,
+        # frappe.db reconnects on demand so close that connection here
+        if close_db and frappe.db:
+            frappe.db.close()
+
+
+def iter_ledger_batches(sales_partner, filters, batch_size=EXPORT_BATCH_SIZE):
+    conditions, base_params = get_ledger_conditions(sales_partner, filters)
+    cursor = None
+    
+    while True:
+        ledgers = fetch_ledger_page(conditions, base_params, batch_size,
+                                    cursor=cursor, from_date=get_range_start(filters))
+        if not ledgers:
+            return
+        yield ledgers
+        if len(ledgers) < batch_size:
+            return
+        cursor = [str(ledgers[-1].date), ledgers[-1].name]
+
+
+def get_transaction_filters(input_data):
+    return frappe._dict({
+        "from_date": (input_data.get('from_date') or '').strip(),
+        "to_date": (input_data.get('to_date') or '').strip(),
+        "search_name": (input_data.get('name') or '').strip(),
+        "trans_type": (input_data.get('type') or '').strip().lower(),
+        "search_mode": (input_data.get('search_mode') or '').strip().lower(),
+    })
+
+
+# Cursors come back from clients, the date is compared with the archive cutoff
+def is_valid_date(value):
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def get_sync_settle_seconds():
+    return cint(frappe.conf.get("united_addon_sync_settle_seconds")) or SYNC_SETTLE_SECONDS
+
+
+# Lower bound of the date filter, used to decide whether archived rows can match
+def get_range_start(filters):
+    return filters.from_date if filters.from_date and filters.to_date else None
+
+
+# WHERE clause shared by every ledger query that takes the get_transaction filters
+def get_ledger_conditions(sales_partner, filters):
+    conditions = ["sales_partner = %s"]
+    params = [sales_partner]
+    
+    # Date filter: if both provided, use BETWEEN; else no date filter
+    if filters.from_date and filters.to_date:
+        conditions.append("date BETWEEN %s AND %s")
+        params.extend([filters.from_date, filters.to_date])
+    
+    # Type filter: credit (points > 0), debit (points < 0)
+    if filters.trans_type == 'credit':
+        conditions.append("points > 0")
+    elif filters.trans_type == 'debit':
+        conditions.append("points < 0")
+    
+    # Name search filter: name OR sales_invoice, narrowed through the trigram index
+    if filters.search_name:
+        search_condition, search_params = get_search_condition(sales_partner, filters.search_name, filters.search_mode)
+        conditions.append(search_condition)
+        params.extend(search_params)
+    
+    return " AND ".join(conditions), params
+
+
+# Counts are cached per partner and filter set, and cleared from the ledger doc_events
+def get_ledger_count(sales_partner, filters):
+    cache_key = LEDGER_COUNT_CACHE_PREFIX + sales_partner
+    filter_key = frappe.as_json(filters, indent=None)
+    
+    total = frappe.cache.hget(cache_key, filter_key)
+    record_cache(total is not None)
+    if total is None:
+        conditions, params = get_ledger_conditions(sales_partner, filters)
+        count = count_ledgers(conditions, params, LEDGER_COUNT_CAP, from_date=get_range_start(filters))
+        
+        # Past the cap, report the cap instead of counting every row
+        total = frappe._dict({"count": min(count, LEDGER_COUNT_CAP), "exact": count <= LEDGER_COUNT_CAP})
+        frappe.cache.hset(cache_key, filter_key, total)
+        # The hash expires as a whole, counted from its first entry
+        redis_key = frappe.cache.make_key(cache_key)
+        if frappe.cache.ttl(redis_key) < 0:
+            frappe.cache.expire(redis_key, LEDGER_COUNT_CACHE_TTL)
+    
+    return total
+
+
+def clear_ledger_count_cache(sales_partner):
+    cache_key = LEDGER_COUNT_CACHE_PREFIX + sales_partner
+    frappe.cache.delete_key(cache_key)
+    # Clear again once the write is visible, so a count taken from the old rows
+    # in between isn't kept
+    frappe.db.after_commit.add(lambda: frappe.cache.delete_key(cache_key))
+
+
+def format_ledger(ledger):
+    amount = ledger.points or 0
+    narration = ledger.sales_invoice or ""
+    ledger_type = "credit" if amount > 0 else "debit"
+    return {
+        "transaction_id": ledger.name,
+        "date": ledger.date,
+        "amount": amount,
+        "sales_invoice": narration,
+        "type": ledger_type
+    }
@@ -0,0 +1,190 @@
+import csv
+import hashlib
+import io
+import json
+import os
+from collections import defaultdict
+from itertools import groupby
+
+import frappe
+from frappe.utils import add_months, add_to_date, flt, get_first_day, get_last_day, getdate, now, nowdate
+from werkzeug.wrappers import Response
+from united_addon.api.utils import gen_response
+from united_addon.api.identity import get_identity, get_identity_error
+from united_addon.api.ledger_archive import ledger_source
+from united_addon.api.points_summary import SUMMARY_DOCTYPE
+from united_addon.api.sales_person import get_sync_settle_seconds
+from united_addon.api.response_cache import is_not_modified, not_modified_response
+
+
+# Monthly points statements (opening balance, entries, closing balance) built once
+# a month is closed and kept as JSON and CSV files under the site's private files.
+# Opening balances come from the monthly rollup, entries from a single ordered pass
+# over the month's ledger. Late entries in a closed month regenerate only the
+# affected partners, from that month up to the latest statement
+
+LEDGER_DOCTYPE = "Sales Partner Points Ledgers"
+STATEMENTS_FOLDER = "united_addon_statements"
+LAST_PERIOD_KEY = "united_addon_statements_last_period"
+WATERMARK_KEY = "united_addon_statements_generated_upto"
+STATEMENT_COLUMNS = ["transaction_id", "date", "amount", "sales_invoice", "type"]
+
+
+def get_period(date):
+    return getdate(date).strftime("%Y-%m")
+
+
+def get_statement_path(sales_partner, period, extension):
+    # Partner names may contain anything, the file name is a digest
+    digest = hashlib.md5(sales_partner.encode()).hexdigest()
+    return frappe.get_site_path("private", "files", STATEMENTS_FOLDER, period, f"{digest}.{extension}")
+
+
+def generate_monthly_statements(chunk_size=200):
+    # Daily: statements of the month that just closed, then late entries in older ones
+    run_started_at = now()
+    last_closed = get_period(add_months(get_first_day(nowdate()), -1))
+    last_generated = frappe.db.get_global(LAST_PERIOD_KEY)
+    since = frappe.db.get_global(WATERMARK_KEY)
+
+    if last_generated and since:
+        # The opening balance of every later statement moved as well
+        stale = defaultdict(set)
+        for sales_partner, period in get_late_entries(since, last_generated):
+            while period <= last_generated:
+                stale[period].add(sales_partner)
+                period = get_period(add_months(period + "-01", 1))
+        for period, sales_partners in sorted(stale.items()):
+            build_statements(period, sorted(sales_partners), chunk_size=chunk_size)
+
+    if last_generated != last_closed:
+        build_statements(last_closed, chunk_size=chunk_size)
+        frappe.db.set_global(LAST_PERIOD_KEY, last_closed)
+
+    # Rows stamped before this run but committed after its scan are picked up by the next
+    # one, which starts a settle window before this run did
+    frappe.db.set_global(
+        WATERMARK_KEY, add_to_date(run_started_at, seconds=-get_sync_settle_seconds(), as_string=True, as_datetime=True)
+    )
+    frappe.db.commit()
+
+
+def get_late_entries(since, last_generated):
+    # Rows inserted, edited or cancelled after the last run that are dated in a generated month
+    return frappe.db.sql(f"""
+        SELECT sales_partner, MIN(DATE_FORMAT(date, '%%Y-%%m')) FROM `tab{LEDGER_DOCTYPE}`
+        WHERE modified >= %s AND date <= %s
+        GROUP BY sales_partner
+    """, (since, get_last_day(last_generated + "-01")))
+
+
+def build_statements(period, sales_partners=None, chunk_size=200):
+    month_start = getdate(period + "-01")
+    month_end = get_last_day(month_start)
+    if sales_partners is None:
+        # Partners with a balance before the month or entries in it
+        sales_partners = frappe.db.sql_list(f"""
+            SELECT DISTINCT sales_partner FROM `tab{SUMMARY_DOCTYPE}`
+            WHERE period_type = 'Month' AND period_start <= %s
+            ORDER BY sales_partner
+        """, (month_start,))
+
+    generated_at = now()
+    for start in range(0, len(sales_partners), chunk_size):
+        chunk = tuple(sales_partners[start:start + chunk_size])
+        openings = dict(frappe.db.sql(f"""
+            SELECT sales_partner, SUM(net_points) FROM `tab{SUMMARY_DOCTYPE}`
+            WHERE sales_partner IN %(chunk)s AND period_type = 'Month' AND period_start < %(month_start)s
+            GROUP BY sales_partner
+        """, {"chunk": chunk, "month_start": month_start}))
+        entries = frappe.db.sql(f"""
+            SELECT sales_partner, name, date, points, sales_invoice
+            FROM {ledger_source("sales_partner, name, date, points, sales_invoice, docstatus")}
+            WHERE sales_partner IN %(chunk)s AND date BETWEEN %(month_start)s AND %(month_end)s AND docstatus < 2
+            ORDER BY sales_partner, date, name
+        """, {"chunk": chunk, "month_start": month_start, "month_end": month_end}, as_dict=1)
+
+        by_partner = {sp: list(rows) for sp, rows in groupby(entries, key=lambda row: row.sales_partner)}
+        for sales_partner in chunk:
+            write_statement(
+                sales_partner, period, flt(openings.get(sales_partner)), by_partner.get(sales_partner, []), generated_at
+            )
+
+
+def write_statement(sales_partner, period, opening_balance, entries, generated_at):
+    rows = [
+        [entry.name, str(entry.date), entry.points, entry.sales_invoice or "", "credit" if entry.points > 0 else "debit"]
+        for entry in entries
+    ]
+    credit = sum(flt(row[2]) for row in rows if flt(row[2]) > 0)
+    debit = -sum(flt(row[2]) for row in rows if flt(row[2]) < 0)
+    statement = {
+        "sales_partner": sales_partner,
+        "period": period,
+        "opening_balance": opening_balance,
+        "credit": credit,
+        "debit": debit,
+        "closing_balance": opening_balance + credit - debit,
+        "generated_at": generated_at,
+        "columns": STATEMENT_COLUMNS,
+        "rows": rows,
+    }
+
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    writer.writerow(["opening_balance", opening_balance])
+    writer.writerow(STATEMENT_COLUMNS)
+    writer.writerows(rows)
+    writer.writerow(["closing_balance", statement["closing_balance"]])
+
+    _write_file(get_statement_path(sales_partner, period, "json"), json.dumps(statement, separators=(",", ":"), default=str))
+    _write_file(get_statement_path(sales_partner, period, "csv"), csv_buffer.getvalue())
+
+
+def _write_file(path, content):
+    # Readers never see a half written statement
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{frappe.generate_hash(length=8)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+#Monthly Statement
+@frappe.whitelist(allow_guest=False, methods=["GET"])
+def get_statement(period, format="json"):
+    try:
+        try:
+            period = get_period(period + "-01")
+        except Exception:
+            return gen_response(400, "Period must be in YYYY-MM format", {})
+        if format not in ("json", "csv"):
+            return gen_response(400, "Unsupported statement format", {})
+
+        identity = get_identity()
+        identity_error = get_identity_error(identity)
+        if identity_error:
+            return gen_response(400, identity_error, {})
+
+        path = get_statement_path(identity.sales_partner, period, format)
+        if not os.path.exists(path):
+            return gen_response(404, "Statement not available for this period", {})
+
+        # Served as stored, the file only changes when late entries regenerate it
+        stat = os.stat(path)
+        etag = f'W/"{int(stat.st_mtime)}-{stat.st_size}"'
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        with open(path, "rb") as f:
+            content = f.read()
+        if format == "csv":
+            return Response(content, content_type="text/csv; charset=utf-8", headers={
+                "ETag": etag,
+                "Content-Disposition": f'attachment; filename="statement-{frappe.scrub(identity.sales_partner)}-{period}.csv"',
+            })
+        return Response(content, content_type="application/json", headers={"ETag": etag})
+
+    except Exception as ex:
+        frappe.log_error(frappe.get_traceback(), "Statement Fetch Error")
+        return gen_response(500, "Failed to fetch statement", str(ex))
@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from functools import lru_cache
+
+import frappe
+from frappe.utils import cint
+from frappe.utils.password import get_encryption_key
+from united_addon.api.identity import get_identity, get_identity_error
+
+
+# Signed, expiring access tokens for the mobile app: "Authorization: Access <token>"
+# Verification is a signature check (memoized in-process) plus a redis revocation lookup,
+# so authenticated requests skip the api_key lookup and secret decryption
+
+TOKEN_SCHEME = "Access"
+ACCESS_TOKEN_TTL = 15 * 60
+REFRESH_TOKEN_TTL = 30 * 24 * 60 * 60
+
+REVOKED_TOKEN_PREFIX = "united_addon:token_revoked:"
+NOT_BEFORE_PREFIX = "united_addon:token_not_before:"
+
+
+def get_token_ttls():
+    # (access, refresh) seconds, site config: united_addon_access_token_ttl / united_addon_refresh_token_ttl
+    return (
+        cint(frappe.conf.get("united_addon_access_token_ttl")) or ACCESS_TOKEN_TTL,
+        cint(frappe.conf.get("united_addon_refresh_token_ttl")) or REFRESH_TOKEN_TTL,
+    )
+
+
+def issue_tokens(identity):
+    now = int(time.time())
+    claims = {
+        "sub": identity.user,
+        "emp": identity.employee,
+        "sp": identity.sales_partner,
+        "iat": now,
+    }
+    access_ttl, refresh_ttl = get_token_ttls()
+
+    return {
+        "access_token": _sign(dict(claims, typ="access", exp=now + access_ttl, jti=frappe.generate_hash(length=12))),
+        "refresh_token": _sign(dict(claims, typ="refresh", exp=now + refresh_ttl, jti=frappe.generate_hash(length=12))),
+        "expires_in": access_ttl,
+        "token_type": TOKEN_SCHEME,
+    }
+
+
+def verify_token(token, token_type="access"):
+    claims = _decode(token, _get_signing_key())
+    if not claims or claims.get("typ") != token_type:
+        return None
+    if claims.get("exp", 0) <= time.time():
+        return None
+    if frappe.cache.get_value(REVOKED_TOKEN_PREFIX + claims["jti"]):
+        return None
+
+    not_before = frappe.cache.get_value(f"{NOT_BEFORE_PREFIX}{token_type}:{claims['sub']}")
+    if not_before and claims.get("iat", 0) < not_before:
+        return None
+
+    return frappe._dict(claims)
+
+
+def revoke_token(claims):
+    ttl = int(claims.get("exp", 0) - time.time())
+    if ttl > 0:
+        frappe.cache.set_value(REVOKED_TOKEN_PREFIX + claims["jti"], 1, expires_in_sec=ttl)
+
+
+def revoke_user_tokens(user, include_refresh=True):
+    # Tokens issued before now stop verifying; refresh tokens survive identity changes.
+    # Each marker lives as long as the tokens it revokes, with the site's configured TTLs
+    now = int(time.time()) + 1
+    access_ttl, refresh_ttl = get_token_ttls()
+    frappe.cache.set_value(f"{NOT_BEFORE_PREFIX}access:{user}", now, expires_in_sec=access_ttl)
+    if include_refresh:
+        frappe.cache.set_value(f"{NOT_BEFORE_PREFIX}refresh:{user}", now, expires_in_sec=refresh_ttl)
+
+
+# auth_hooks entry: runs after frappe's own token/oauth checks
+def validate_auth():
+    auth_type, _, token = frappe.get_request_header("Authorization", "").partition(" ")
+    if auth_type.lower() != TOKEN_SCHEME.lower() or not token:
+        return
+
+    # On failure frappe raises AuthenticationError since the user is still Guest
+    claims = verify_token(token.strip())
+    if not claims:
+        return
+
+    form_dict = frappe.local.form_dict
+    frappe.set_user(claims.sub)
+    frappe.local.form_dict = form_dict
+    frappe.local.united_addon_token_claims = claims
+
+
+# Refresh Token
+@frappe.whitelist(allow_guest=True, methods="POST")
+def refresh_token(refresh_token):
+    claims = verify_token(refresh_token, token_type="refresh")
+    if not claims:
+        frappe.local.response.http_status_code = 401
+        frappe.local.response["message"] = "Invalid or expired refresh token"
+        frappe.local.response["error_type"] = "invalid_refresh_token"
+        return
+
+    identity = get_identity(claims.sub)
+    identity_error = get_identity_error(identity)
+    if identity_error:
+        revoke_token(claims)
+        frappe.local.response.http_status_code = 401
+        frappe.local.response["message"] = identity_error
+        frappe.local.response["error_type"] = "identity_changed"
+        return
+
+    # Refresh tokens are single use
+    revoke_token(claims)
+    frappe.response.update(issue_tokens(identity))
+    frappe.response["message"] = "Token refreshed"
+
+
+# Revoke Token
+@frappe.whitelist(allow_guest=True, methods="POST")
+def revoke(refresh_token=None):
+    access_claims = getattr(frappe.local, "united_addon_token_claims", None)
+    if access_claims:
+        revoke_token(access_claims)
+
+    refresh_claims = verify_token(refresh_token, token_type="refresh") if refresh_token else None
+    if refresh_claims:
+        revoke_token(refresh_claims)
+
+    frappe.response["message"] = "Token revoked"
+
+
+# doc_events handler for User
+def on_user_update(doc, method=None):
+    if not doc.enabled:
+        revoke_user_tokens(doc.name)
+
+
+def _sign(claims):
+    payload = _b64encode(json.dumps(claims, separators=(",", ":"), sort_keys=True).encode())
+    signature = hmac.new(_get_signing_key(), payload.encode(), hashlib.sha256).digest()
+    return f"{payload}.{_b64encode(signature)}"
+
+
+@lru_cache(maxsize=4096)
+def _decode(token, signing_key):
+    # Memoizes the signature check and JSON parse only, expiry and revocation are checked per call
+    try:
+        payload, signature = token.split(".")
+        expected = hmac.new(signing_key, payload.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(claims, dict) or not claims.get("sub") or not claims.get("jti"):
+        return None
+    return claims
+
+
+def _get_signing_key():
+    secret = frappe.conf.get("united_addon_token_secret") or get_encryption_key()
+    return hashlib.sha256(f"united_addon:access-token:{secret}".encode()).digest()
+
+
+def _b64encode(value):
+    return base64.urlsafe_b64encode(value).decode().rstrip("=")
+
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
@@ -1,20 +1,120 @@
 from datetime import timezone
+import base64
+import gzip
+import html
+import json
+import re
 import frappe
-from bs4 import BeautifulSoup
-from frappe.utils import cstr
+from frappe.utils import cint, cstr
+
+
+# Tags (and the body of script/style blocks) removed from 500 messages
+HTML_TAG_PATTERN = re.compile(r"<(script|style)\b.*?</\1\s*>|<!--.*?-->|</?[A-Za-z][^<>]*>", re.IGNORECASE | re.DOTALL)
+
+# Bodies smaller than this are not worth gzipping
+GZIP_MIN_SIZE = 1024
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
 
 
 # Start here to Supporting Functions
-def gen_response(status, message, data=[]):
+def gen_response(status, message, data=[], row_keys=None):
     if "session_expired" in frappe.response and frappe.response["session_expired"] == 1:
         message = "Session Expired.Please login again."
         status = 403
     frappe.response["http_status_code"] = status
     if status == 500:
-        frappe.response["message"] = BeautifulSoup(str(message)).get_text()
+        frappe.response["message"] = html_to_text(message)
     else:
         frappe.response["message"] = message
+    if status < 300 and row_keys:
+        data = apply_response_shape(data, row_keys)
     frappe.response["data"] = data
+    frappe.local.united_addon_encode_response = True
+
+
+# Transaction row lists named by the endpoint (row_keys), shaped on request:
+# fields=date,amount keeps only those keys of every row and compact=1 sends
+# {"columns": [...], "rows": [[...], ...]}
+def get_response_shape():
+    form_dict = getattr(frappe.local, "form_dict", None) or {}
+    fields = form_dict.get("fields") or []
+    if isinstance(fields, str):
+        fields = [fieldname.strip() for fieldname in fields.split(",") if fieldname.strip()]
+    return frappe._dict({"fields": fields, "compact": cint(form_dict.get("compact"))})
+
+
+def apply_response_shape(data, row_keys, shape=None):
+    shape = shape or get_response_shape()
+    if not (shape.fields or shape.compact) or not isinstance(data, dict):
+        return data
+    # New dict, the original may be the cached payload
+    return {
+        key: shape_rows(value, shape.fields, shape.compact) if key in row_keys and isinstance(value, list) else value
+        for key, value in data.items()
+    }
+
+
+def shape_rows(rows, fields=None, compact=False):
+    columns = list(fields or (rows[0] if rows else []))
+    if compact:
+        return {"columns": columns, "rows": [[row.get(column) for column in columns] for row in rows]}
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+# Cheap replacement for BeautifulSoup(...).get_text() on error messages
+def html_to_text(value):
+    value = cstr(value)
+    if "<" not in value and "&" not in value:
+        return value
+    return html.unescape(HTML_TAG_PATTERN.sub("", value))
+
+
+# Extra headers for the current response, applied by the after_request hook
+def set_response_header(key, value):
+    if not hasattr(frappe.local, "united_addon_response_headers"):
+        frappe.local.united_addon_response_headers = {}
+    frappe.local.united_addon_response_headers[key] = value
+
+
+def apply_response_headers(response=None, request=None):
+    headers = getattr(frappe.local, "united_addon_response_headers", None)
+    if headers and response is not None:
+        for key, value in headers.items():
+            response.headers[key] = value
+
+
+# Gzip or msgpack bodies for the gen_response endpoints, negotiated through the
+# Accept and Accept-Encoding headers; applied by the after_request hook
+def encode_response(response=None, request=None):
+    if response is None or not getattr(frappe.local, "united_addon_encode_response", False):
+        return
+    # Streamed exports (direct_passthrough, bytes chunks) and other non-JSON bodies go out as they are
+    if response.direct_passthrough or response.is_streamed or response.mimetype != "application/json":
+        return
+    request = request or frappe.request
+
+    response.vary.add("Accept")
+    accept = request.headers.get("Accept") or ""
+    if any(mimetype in accept for mimetype in MSGPACK_MIMETYPES):
+        try:
+            import msgpack
+        except ImportError:
+            msgpack = None
+        if msgpack:
+            from frappe.utils.response import json_handler
+
+            response.set_data(msgpack.packb(frappe.local.response, default=json_handler))
+            response.mimetype = "application/msgpack"
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if (
+        "gzip" in (request.headers.get("Accept-Encoding") or "")
+        and len(data) >= GZIP_MIN_SIZE
+        and "Content-Encoding" not in response.headers
+    ):
+        response.set_data(gzip.compress(data, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
 
 
 def exception_handler(e):
@@ -24,3 +124,19 @@ def exception_handler(e):
     else:
         return gen_response(500, cstr(e))
 
+
+# Opaque keyset cursor for (date, name) ordered ledger pages
+def encode_cursor(*values):
+    payload = json.dumps([cstr(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size=2):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        return None
+    return values
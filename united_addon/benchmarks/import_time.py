@@ -0,0 +1,75 @@
+"""Import-time and error-path cost of the united_addon API modules.
+
+Each import is timed in a fresh interpreter, the way a gunicorn worker pays
+for it on boot. Run from the bench python environment:
+
+    python -m united_addon.benchmarks.import_time --workers 8
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import timeit
+
+MODULES = ["bs4", "frappe", "united_addon.api.utils", "united_addon.api.auth", "united_addon.api.sales_person"]
+
+SAMPLE_MESSAGE = (
+    "<div class='error'><p>Traceback (most recent call last):</p>"
+    "<pre>  File &quot;apps/united_addon/united_addon/api/sales_person.py&quot;, line 42</pre>"
+    "<script>console.log('x')</script><b>OperationalError</b>: (1205, 'Lock wait timeout exceeded')</div>"
+) * 4
+
+
+def time_import(module, repeat):
+    # Modules already imported by earlier entries (e.g. frappe) are preloaded so only the delta is measured
+    preload = "; ".join(f"import {m}" for m in MODULES[:MODULES.index(module)] if m not in ("bs4",))
+    code = (
+        f"import time; {preload + ';' if preload else ''}"
+        f"t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    )
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode:
+            return None
+        samples.append(float(result.stdout.strip()))
+    return statistics.median(samples)
+
+
+def time_sanitizer(number):
+    from united_addon.api.utils import html_to_text
+
+    results = {"html_to_text_us": timeit.timeit(lambda: html_to_text(SAMPLE_MESSAGE), number=number) / number * 1e6}
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        return results
+
+    results["beautifulsoup_us"] = (
+        timeit.timeit(lambda: BeautifulSoup(SAMPLE_MESSAGE, "html.parser").get_text(), number=number) / number * 1e6
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--number", type=int, default=2000, help="sanitizer calls per measurement")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers, to scale the boot saving")
+    args = parser.parse_args()
+
+    imports = {module: time_import(module, args.repeat) for module in MODULES}
+    results = {"import_seconds": imports, "sanitizer": time_sanitizer(args.number)}
+
+    # bs4 is no longer imported by the API modules, so its import time is the per-worker boot saving
+    if imports.get("bs4") is not None:
+        results["boot_saving_seconds_per_worker"] = imports["bs4"]
+        results["boot_saving_seconds_total"] = imports["bs4"] * args.workers
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Latency and throughput of the sales partner APIs under concurrent load.
+
+Drives a running site over HTTP with the users created by seed_data, one
+scenario at a time, and writes per-scenario percentiles as JSON. With
+--baseline the run is compared to a stored result and exits non-zero when a
+scenario got slower or slower-throughput than the tolerance allows, for CI:
+
+    python -m united_addon.benchmarks.load_test --url http://bench.local:8000 \\
+        --concurrency 16 --output result.json --baseline baseline.json
+
+Every request comes from one IP. The setup logins (--users) and the login scenario
+(--requests) count against the per-IP login limit of auth.login, 1000 per minute
+by default. Larger runs must list the load generator's IP in the site config key
+united_addon_login_throttle_exempt_ips, or the logins turn into 429s. The
+per-username limit (10 per 5 minutes) still applies, so keep --users at or above
+--requests / 9 when running the login scenario.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from united_addon.benchmarks.seed_data import INVOICE_NAME, USER_EMAIL
+
+API = "/api/method/united_addon.api."
+SCENARIOS = ["login", "dashboard", "deep_pagination", "search", "export"]
+
+
+class Client:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, path, token=None, params=None, body=None, headers=None):
+        # Returns (status, response bytes); the body is read fully, as a client would
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = token
+
+        req = urllib.request.Request(url, data=data, headers=headers, method="POST" if data is not None else "GET")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, response.read(), response.headers
+        except urllib.error.HTTPError as error:
+            return error.code, error.read(), error.headers
+
+    def login(self, user, password):
+        status, payload, _ = self.request(API + "auth.login", body={"usr": user, "pwd": password})
+        if status != 200:
+            raise RuntimeError(f"Login failed for {user}: {status}")
+        return json.loads(payload)["token"]
+
+
+class Scenarios:
+    def __init__(self, client, tokens, users, password, max_page, ledgers):
+        self.client = client
+        self.tokens = tokens
+        self.users = users
+        self.password = password
+        self.max_page = max_page
+        self.ledgers = ledgers
+        self.local = threading.local()
+
+    def pick_token(self):
+        # Skewed like the data: the busiest partners poll the most
+        return self.tokens[min(int(random.expovariate(5 / len(self.tokens))), len(self.tokens) - 1)]
+
+    def login(self):
+        user = random.choice(self.users)
+        return self.client.request(API + "auth.login", body={"usr": user, "pwd": self.password})
+
+    def dashboard(self):
+        # Polling clients send back the ETag of their previous response
+        token = self.pick_token()
+        etags = self.local.__dict__.setdefault("etags", {})
+        headers = {"If-None-Match": etags[token]} if token in etags else None
+        status, payload, response_headers = self.client.request(
+            API + "sales_person.get_dashboard_data", token=token, headers=headers
+        )
+        if response_headers.get("ETag"):
+            etags[token] = response_headers["ETag"]
+        return status, payload, response_headers
+
+    def deep_pagination(self):
+        return self.client.request(API + "sales_person.get_transaction", token=self.pick_token(), body={
+            "page": random.randint(self.max_page // 2, self.max_page), "limit": 50
+        })
+
+    def search(self):
+        # A seeded invoice number without its last digits matches a block of 1000 invoices,
+        # spread over the partners like the rest of the ledger
+        term = INVOICE_NAME.format(random.randrange(self.ledgers))[:-3]
+        return self.client.request(API + "sales_person.get_transaction", token=self.pick_token(), body={
+            "name": term, "limit": 25
+        })
+
+    def export(self):
+        return self.client.request(API + "sales_person.export_transactions", token=self.pick_token(), params={
+            "format": "csv", "from_date": "2000-01-01", "to_date": time.strftime("%Y-%m-%d")
+        })
+
+
+def percentile(samples, quantile):
+    return samples[min(len(samples) - 1, int(quantile * len(samples)))] if samples else 0
+
+
+def run_scenario(scenario, concurrency, requests):
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            status, payload, _ = scenario()
+        except Exception:
+            return time.perf_counter() - start, 0, 0
+        return time.perf_counter() - start, status, len(payload)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration * 1000 for duration, _, _ in results)
+    errors = sum(1 for _, status, _ in results if not status or status >= 400)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2),
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p90": round(percentile(latencies, 0.9), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2),
+        },
+        "response_bytes_mean": round(statistics.fmean(size for _, _, size in results)),
+    }
+
+
+def compare(result, baseline, tolerance):
+    # A scenario regresses when p95 grows or throughput drops by more than the tolerance
+    regressions = []
+    for name, current in result["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['latency_ms']['p95']}ms -> {current['latency_ms']['p95']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True, help="base url of the test site")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated, from: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--users", type=int, default=200, help="seeded users to log in as")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--max-page", type=int, default=200, help="deepest page for deep_pagination")
+    parser.add_argument("--ledgers", type=int, default=2000000, help="ledger rows seeded, for search terms")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON result here as well as to stdout")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    client = Client(args.url, args.timeout)
+    users = [USER_EMAIL.format(idx) for idx in range(1, args.users + 1)]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        tokens = list(executor.map(lambda user: client.login(user, args.password), users))
+    scenarios = Scenarios(client, tokens, users, args.password, args.max_page, args.ledgers)
+
+    result = {
+        "url": args.url,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scenarios": {
+            name: run_scenario(getattr(scenarios, name), args.concurrency, args.requests)
+            for name in args.scenarios.split(",") if name in SCENARIOS
+        },
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["regressions"] = compare(result, json.load(f), args.tolerance)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+    if result.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Payload size and serialization time of the transaction response formats.
+
+Compares today's verbose rows with field projection, the compact columnar form,
+gzip and msgpack on a synthetic get_transaction page. Run from the bench
+python environment:
+
+    python -m united_addon.benchmarks.response_format --rows 100
+"""
+
+import argparse
+import gzip
+import json
+import random
+import timeit
+from datetime import date, timedelta
+
+from united_addon.api.utils import shape_rows
+
+
+def make_transactions(rows):
+    today = date.today()
+    transactions = []
+    for idx in range(rows):
+        points = random.randint(1, 500) if random.random() > 0.1 else -random.randint(10, 1000)
+        transactions.append({
+            "transaction_id": f"SPPL-{idx:08d}",
+            "date": str(today - timedelta(days=idx // 5)),
+            "amount": points,
+            "sales_invoice": f"ACC-SINV-2026-{idx:05d}" if points > 0 else "",
+            "type": "credit" if points > 0 else "debit",
+        })
+    return transactions
+
+
+def measure(name, payload, number, msgpack):
+    # Every format serializes the same body, so its time and size describe one payload
+    response = {"message": "Transaction Data Fetched Successfully", "data": payload}
+    # Same separators as frappe's as_json
+    dumps = lambda: json.dumps(response, separators=(",", ":"))
+    body = dumps().encode()
+    result = {
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=5)),
+        "serialize_us": timeit.timeit(dumps, number=number) / number * 1e6,
+        "gzip_us": timeit.timeit(lambda: gzip.compress(body, compresslevel=5), number=number) / number * 1e6,
+    }
+    if msgpack:
+        pack = lambda: msgpack.packb(response)
+        result["msgpack_bytes"] = len(pack())
+        result["msgpack_us"] = timeit.timeit(pack, number=number) / number * 1e6
+    return name, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100, help="transactions per page")
+    parser.add_argument("--number", type=int, default=500, help="serializations per measurement")
+    parser.add_argument("--fields", default="date,amount,type", help="projection to measure")
+    args = parser.parse_args()
+
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+
+    random.seed(42)
+    transactions = make_transactions(args.rows)
+    fields = args.fields.split(",")
+    page = lambda rows: {"sales_partner": "SP-0001", "transactions": rows, "next_cursor": None}
+
+    results = dict([
+        measure("verbose", page(transactions), args.number, msgpack),
+        measure("projected", page(shape_rows(transactions, fields)), args.number, msgpack),
+        measure("compact", page(shape_rows(transactions, compact=True)), args.number, msgpack),
+        measure("compact_projected", page(shape_rows(transactions, fields, compact=True)), args.number, msgpack),
+    ])
+    baseline = results["verbose"]["bytes"]
+    for result in results.values():
+        result["size_vs_verbose"] = round(result["bytes"] / baseline, 3)
+        result["gzip_size_vs_verbose"] = round(result["gzip_bytes"] / baseline, 3)
+
+    print(json.dumps({"rows": args.rows, "msgpack_available": bool(msgpack), "formats": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Seed a local test site with synthetic sales partners and points ledger rows.
+
+Creates one User -> Employee -> Sales Partner chain per partner and spreads the
+ledger rows over them with a Zipf skew, so a handful of partners own most of the
+history the way real top sellers do. Everything created is prefixed with BENCH
+and removed again by --clear. Never run this against a production site.
+Run from the bench directory:
+
+    python -m united_addon.benchmarks.seed_data --site bench.local --partners 2000 --ledgers 2000000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+USER_EMAIL = "bench.user.{:06d}@example.com"
+EMPLOYEE_NAME = "BENCH-EMP-{:06d}"
+PARTNER_NAME = "BENCH-SP-{:06d}"
+LEDGER_NAME = "BENCH-SPPL-{:010d}"
+INVOICE_NAME = "BENCH-SINV-{:08d}"
+LEDGER_TABLE = "tabSales Partner Points Ledgers"
+
+
+def get_partner_weights(partners, skew):
+    # Zipf: the partner at rank r gets weight 1 / r^skew
+    weights = [1 / (rank ** skew) for rank in range(1, partners + 1)]
+    total = sum(weights)
+    cumulative, running = [], 0.0
+    for weight in weights:
+        running += weight / total
+        cumulative.append(running)
+    return cumulative
+
+
+def seed_partners(frappe, partners, password):
+    from frappe.utils import now
+    from frappe.utils.password import passlibctx
+
+    company = frappe.defaults.get_global_default("company") or frappe.db.get_value("Company", {}, "name")
+    territory = frappe.db.get_value("Territory", {"is_group": 0}, "name") or "All Territories"
+    timestamp = now()
+    # Hash once, every bench user shares the password
+    password_hash = passlibctx.hash(password)
+
+    existing = set(frappe.db.sql_list("SELECT name FROM `tabSales Partner` WHERE name LIKE 'BENCH-SP-%%'"))
+    for idx in range(1, partners + 1):
+        if PARTNER_NAME.format(idx) in existing:
+            continue
+        email = USER_EMAIL.format(idx)
+        common = {"creation": timestamp, "modified": timestamp, "owner": "Administrator", "modified_by": "Administrator"}
+
+        frappe.get_doc({
+            "doctype": "User", "name": email, "email": email, "first_name": f"Bench {idx}",
+            "user_type": "System User", "enabled": 1, "send_welcome_email": 0, **common,
+        }).db_insert()
+        frappe.get_doc({
+            "doctype": "Has Role", "parent": email, "parenttype": "User", "parentfield": "roles",
+            "role": "Employee", **common,
+        }).db_insert()
+        frappe.get_doc({
+            "doctype": "Employee", "name": EMPLOYEE_NAME.format(idx), "first_name": "Bench",
+            "last_name": str(idx), "employee_name": f"Bench {idx}", "gender": random.choice(["Male", "Female"]),
+            "date_of_birth": "1990-01-01", "date_of_joining": "2020-01-01", "status": "Active",
+            "company": company, "user_id": email, **common,
+        }).db_insert()
+        frappe.get_doc({
+            "doctype": "Sales Partner", "name": PARTNER_NAME.format(idx), "partner_name": PARTNER_NAME.format(idx),
+            "territory": territory, "commission_rate": 0, "custom_employee": EMPLOYEE_NAME.format(idx),
+            "custom_earned_points": 0, **common,
+        }).db_insert()
+        frappe.db.sql("""
+            INSERT INTO `__Auth` (doctype, name, fieldname, `password`, encrypted)
+            VALUES ('User', %s, 'password', %s, 0)
+            ON DUPLICATE KEY UPDATE `password` = VALUES(`password`)
+        """, (email, password_hash))
+
+        if idx % 500 == 0:
+            frappe.db.commit()
+    frappe.db.commit()
+
+
+def seed_ledgers(frappe, partners, ledgers, skew, days, chunk_size=5000):
+    from frappe.utils import now
+
+    cumulative = get_partner_weights(partners, skew)
+    start = frappe.db.sql(f"SELECT COUNT(*) FROM `{LEDGER_TABLE}` WHERE name LIKE 'BENCH-SPPL-%%'")[0][0]
+    timestamp = now()
+    today = date.today()
+
+    for chunk_start in range(start, ledgers, chunk_size):
+        numbers = range(chunk_start, min(chunk_start + chunk_size, ledgers))
+        chosen = random.choices(range(1, partners + 1), cum_weights=cumulative, k=len(numbers))
+        values = []
+        for number, partner in zip(numbers, chosen):
+            # Recent months are busier than old ones
+            entry_date = today - timedelta(days=int(days * random.random() ** 2))
+            points = -random.randint(10, 1000) if random.random() < 0.1 else random.randint(1, 500)
+            values.extend([
+                LEDGER_NAME.format(number), timestamp, timestamp, "Administrator", "Administrator", 1,
+                PARTNER_NAME.format(partner), entry_date, points,
+                INVOICE_NAME.format(number) if points > 0 else None,
+            ])
+        frappe.db.sql(f"""
+            INSERT IGNORE INTO `{LEDGER_TABLE}`
+                (name, creation, modified, owner, modified_by, docstatus, sales_partner, date, points, sales_invoice)
+            VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * (len(values) // 10))}
+        """, tuple(values))
+        frappe.db.commit()
+
+
+def rebuild_derived_data():
+    from united_addon.api.points_summary import rebuild_points_summary
+    from united_addon.api.ledger_search import rebuild_search_index
+    from united_addon.api.leaderboard import rebuild_current_leaderboard
+    from united_addon.api.reconciliation import reconcile_all_earned_points
+
+    rebuild_points_summary()
+    rebuild_search_index()
+    rebuild_current_leaderboard()
+    reconcile_all_earned_points()
+
+
+def clear(frappe):
+    for table, pattern in (
+        (LEDGER_TABLE, "BENCH-SPPL-%%"),
+        ("tabSales Partner", "BENCH-SP-%%"),
+        ("tabEmployee", "BENCH-EMP-%%"),
+        ("tabHas Role", "bench.user.%%"),
+        ("__Auth", "bench.user.%%"),
+        ("tabUser", "bench.user.%%"),
+    ):
+        column = "parent" if table == "tabHas Role" else "name"
+        frappe.db.sql(f"DELETE FROM `{table}` WHERE `{column}` LIKE '{pattern}'")
+        frappe.db.commit()
+    frappe.cache.delete_keys("united_addon:")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--site", required=True)
+    parser.add_argument("--sites-path", default="sites")
+    parser.add_argument("--partners", type=int, default=2000)
+    parser.add_argument("--ledgers", type=int, default=2000000, help="total BENCH ledger rows to reach")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of rows per partner")
+    parser.add_argument("--days", type=int, default=730, help="history length")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible data")
+    parser.add_argument("--clear", action="store_true", help="remove all BENCH data instead")
+    args = parser.parse_args()
+
+    import frappe
+
+    random.seed(args.seed)
+    frappe.init(site=args.site, sites_path=args.sites_path)
+    frappe.connect()
+    try:
+        if not frappe.conf.get("developer_mode") and not frappe.conf.get("allow_tests"):
+            raise SystemExit("Refusing to seed: enable allow_tests in the site config of a test site")
+
+        started = time.monotonic()
+        if args.clear:
+            clear(frappe)
+        else:
+            seed_partners(frappe, args.partners, args.password)
+            seed_ledgers(frappe, args.partners, args.ledgers, args.skew, args.days)
+            rebuild_derived_data()
+
+        print(json.dumps({
+            "site": args.site,
+            "cleared": args.clear,
+            "partners": args.partners,
+            "ledgers": args.ledgers,
+            "skew": args.skew,
+            "seconds": round(time.monotonic() - started, 1),
+        }, indent=2))
+    finally:
+        frappe.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("check-query-plans")
+@pass_context
+def check_query_plans(context):
+    "EXPLAIN the united_addon hot queries and fail if one stops using an index"
+    from united_addon.indexes import check_hot_query_plans
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        problems = check_hot_query_plans(raise_exception=False)
+    finally:
+        frappe.destroy()
+
+    for problem in problems:
+        click.secho(problem, fg="red")
+    if problems:
+        raise SystemExit(1)
+    click.secho("All hot queries use an index", fg="green")
+
+
+@click.command("rebuild-points-summary")
+@click.option("--chunk-size", default=200, type=int, help="Sales partners per chunk")
+@pass_context
+def rebuild_points_summary(context, chunk_size=200):
+    "Recompute Sales Partner Points Summary from the points ledger"
+    from united_addon.api.points_summary import rebuild_points_summary as rebuild
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        rebuild(chunk_size=chunk_size)
+    finally:
+        frappe.destroy()
+
+
+@click.command("rebuild-ledger-search")
+@click.option("--batch-size", default=5000, type=int, help="Ledger rows per batch")
+@pass_context
+def rebuild_ledger_search(context, batch_size=5000):
+    "Rebuild the trigram search index over ledger name and sales invoice"
+    from united_addon.api.ledger_search import rebuild_search_index
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        rebuild_search_index(batch_size=batch_size)
+    finally:
+        frappe.destroy()
+
+
+@click.command("archive-points-ledger")
+@click.option("--before", help="Archive ledger rows dated before this date (default: start of the current fiscal year)")
+@click.option("--chunk-size", default=200, type=int, help="Sales partners per chunk")
+@pass_context
+def archive_points_ledger(context, before=None, chunk_size=200):
+    "Move closed fiscal periods of the points ledger into the archive table"
+    from united_addon.api.ledger_archive import archive_closed_periods
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        archive_closed_periods(before_date=before, chunk_size=chunk_size)
+    finally:
+        frappe.destroy()
+
+
+@click.command("rebuild-leaderboard")
+@click.option("--period", help="Month to rebuild as YYYY-MM (default: current month)")
+@click.option("--chunk-size", default=500, type=int, help="Sales partners per chunk")
+@pass_context
+def rebuild_leaderboard(context, period=None, chunk_size=500):
+    "Rebuild a monthly sales partner leaderboard from the points ledger"
+    from united_addon.api.leaderboard import rebuild_leaderboard as rebuild
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        rebuild(period, chunk_size=chunk_size)
+    finally:
+        frappe.destroy()
+
+
+@click.command("build-points-statements")
+@click.option("--period", required=True, help="Month to (re)build as YYYY-MM")
+@click.option("--chunk-size", default=200, type=int, help="Sales partners per chunk")
+@pass_context
+def build_points_statements(context, period, chunk_size=200):
+    "Build the stored monthly points statements of every sales partner for a month"
+    from united_addon.api.statements import build_statements
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        build_statements(period, chunk_size=chunk_size)
+    finally:
+        frappe.destroy()
+
+
+commands = [
+    check_query_plans,
+    rebuild_points_summary,
+    rebuild_ledger_search,
+    archive_points_ledger,
+    rebuild_leaderboard,
+    build_points_statements,
+]
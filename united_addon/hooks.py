@@ -145,6 +145,38 @@ app_license = "mit"
 # 	}
 # }
 
+doc_events = {
+	"User": {
+		"on_update": [
+			"united_addon.api.identity.clear_identity_cache",
+			"united_addon.api.tokens.on_user_update",
+		],
+		"on_trash": "united_addon.api.identity.clear_identity_cache",
+		"after_rename": "united_addon.api.identity.clear_identity_cache",
+	},
+	"Employee": {
+		"on_update": "united_addon.api.identity.clear_identity_cache",
+		"on_trash": "united_addon.api.identity.clear_identity_cache",
+		"after_rename": "united_addon.api.identity.clear_identity_cache",
+	},
+	"Sales Partner": {
+		"on_update": [
+			"united_addon.api.identity.clear_identity_cache",
+			"united_addon.api.response_cache.on_sales_partner_update",
+			"united_addon.api.replica.on_sales_partner_update",
+		],
+		"on_trash": "united_addon.api.identity.clear_identity_cache",
+		"after_rename": "united_addon.api.identity.clear_identity_cache",
+	},
+	"Sales Partner Points Ledgers": {
+		"after_insert": "united_addon.api.ledger_events.on_ledger_insert",
+		"on_update": "united_addon.api.ledger_events.on_ledger_update",
+		"on_cancel": "united_addon.api.ledger_events.on_ledger_cancel",
+		"on_trash": "united_addon.api.ledger_events.on_ledger_trash",
+		"after_rename": "united_addon.api.ledger_events.on_ledger_rename",
+	},
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -166,6 +198,22 @@ app_license = "mit"
 # 	],
 # }
 
+scheduler_events = {
+	"daily_long": [
+		"united_addon.api.leaderboard.rebuild_current_leaderboard",
+		"united_addon.api.statements.generate_monthly_statements"
+	],
+	"hourly_long": [
+		"united_addon.api.reconciliation.reconcile_earned_points"
+	],
+	"weekly_long": [
+		"united_addon.api.reconciliation.reconcile_all_earned_points"
+	],
+	"monthly_long": [
+		"united_addon.api.ledger_archive.archive_closed_periods"
+	],
+}
+
 # Testing
 # -------
 
@@ -199,6 +247,13 @@ app_license = "mit"
 # before_request = ["united_addon.utils.before_request"]
 # after_request = ["united_addon.utils.after_request"]
 
+before_request = ["united_addon.api.metrics.start_request_metrics"]
+after_request = [
+	"united_addon.api.utils.apply_response_headers",
+	"united_addon.api.utils.encode_response",
+	"united_addon.api.metrics.finish_request_metrics",
+]
+
 # Job Events
 # ----------
 # before_job = ["united_addon.utils.before_job"]
@@ -235,6 +290,10 @@ app_license = "mit"
 # 	"united_addon.auth.validate"
 # ]
 
+auth_hooks = [
+	"united_addon.api.tokens.validate_auth"
+]
+
 # Automatically update python controller files with type annotations for this app.
 # export_python_type_annotations = True
 
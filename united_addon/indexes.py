@@ -0,0 +1,109 @@
+import frappe
+
+
+LEDGER_DOCTYPE = "Sales Partner Points Ledgers"
+
+# (doctype, index name, columns) for the queries behind the sales person APIs
+HOT_INDEXES = [
+    (LEDGER_DOCTYPE, "sales_partner_date_name_index", ["sales_partner", "date", "name"]),
+    (LEDGER_DOCTYPE, "sales_partner_points_date_index", ["sales_partner", "points", "date"]),
+    (LEDGER_DOCTYPE, "sales_partner_sales_invoice_index", ["sales_partner", "sales_invoice"]),
+    (LEDGER_DOCTYPE, "sales_partner_modified_name_index", ["sales_partner", "modified", "name"]),
+    (LEDGER_DOCTYPE, "modified_sales_partner_index", ["modified", "sales_partner"]),
+    ("Sales Partner", "custom_employee_index", ["custom_employee"]),
+    ("Employee", "user_id_index", ["user_id"]),
+]
+
+# (label, query) pairs checked by check_hot_query_plans, %(sales_partner)s is filled from the ledger
+HOT_QUERIES = [
+    ("dashboard_recent", """
+        SELECT name, date, points, sales_invoice FROM `tabSales Partner Points Ledgers`
+        WHERE sales_partner = %(sales_partner)s
+        ORDER BY date DESC, name DESC
+        LIMIT 10
+    """),
+    ("transactions_credit", """
+        SELECT name, date, points, sales_invoice FROM `tabSales Partner Points Ledgers`
+        WHERE sales_partner = %(sales_partner)s AND points > 0
+        ORDER BY date DESC, name DESC
+        LIMIT 25
+    """),
+    ("transactions_date_range", """
+        SELECT name, date, points, sales_invoice FROM `tabSales Partner Points Ledgers`
+        WHERE sales_partner = %(sales_partner)s AND date BETWEEN %(from_date)s AND %(to_date)s
+        ORDER BY date DESC, name DESC
+        LIMIT 25
+    """),
+    ("transactions_cursor", """
+        SELECT name, date, points, sales_invoice FROM `tabSales Partner Points Ledgers`
+        WHERE sales_partner = %(sales_partner)s
+            AND (date < %(to_date)s OR (date = %(to_date)s AND name < %(name)s))
+        ORDER BY date DESC, name DESC
+        LIMIT 25
+    """),
+    ("sync_since_watermark", """
+        SELECT name, date, points, sales_invoice, docstatus, modified FROM `tabSales Partner Points Ledgers`
+        WHERE sales_partner = %(sales_partner)s AND modified < %(to_date)s
+            AND (modified > %(from_date)s OR (modified = %(from_date)s AND name > %(name)s))
+        ORDER BY modified, name
+        LIMIT 201
+    """),
+    ("sales_partner_by_employee", """
+        SELECT name FROM `tabSales Partner` WHERE custom_employee = %(employee)s LIMIT 1
+    """),
+    ("employee_by_user", """
+        SELECT name FROM `tabEmployee` WHERE user_id = %(user)s LIMIT 1
+    """),
+]
+
+
+def ensure_indexes(indexes=None):
+    for doctype, index_name, columns in indexes or HOT_INDEXES:
+        if not frappe.db.table_exists(doctype):
+            continue
+        if len(columns) == 1 and has_leading_index(doctype, columns[0]):
+            continue
+        frappe.db.add_index(doctype, columns, index_name)
+
+
+def has_leading_index(doctype, column):
+    return bool(frappe.db.sql(
+        f"SHOW INDEX FROM `tab{doctype}` WHERE Column_name = %s AND Seq_in_index = 1",
+        (column,),
+    ))
+
+
+def check_hot_query_plans(raise_exception=True):
+    # EXPLAIN every hot query and report the ones that scan the table or filesort
+    values = _get_sample_values()
+    problems = []
+
+    for label, query in HOT_QUERIES:
+        for row in frappe.db.sql("EXPLAIN " + query, values, as_dict=1):
+            extra = row.get("Extra") or ""
+            if "Impossible WHERE" in extra or "no matching row" in extra:
+                continue
+            if row.get("type") == "ALL" or not row.get("key"):
+                problems.append(f"{label}: full scan on {row.get('table')}")
+            elif "Using filesort" in extra:
+                problems.append(f"{label}: filesort on {row.get('table')} using {row.get('key')}")
+
+    if problems and raise_exception:
+        frappe.throw("<br>".join(problems), title="Hot query is not using an index")
+
+    return problems
+
+
+def _get_sample_values():
+    sales_partner = frappe.db.sql(f"SELECT sales_partner FROM `tab{LEDGER_DOCTYPE}` LIMIT 1")
+    employee = frappe.db.sql("SELECT custom_employee FROM `tabSales Partner` WHERE custom_employee IS NOT NULL LIMIT 1")
+    user = frappe.db.sql("SELECT user_id FROM `tabEmployee` WHERE user_id IS NOT NULL LIMIT 1")
+
+    return {
+        "sales_partner": sales_partner[0][0] if sales_partner else "",
+        "employee": employee[0][0] if employee else "",
+        "user": user[0][0] if user else "",
+        "from_date": "2000-01-01",
+        "to_date": "2100-01-01",
+        "name": "~",
+    }
@@ -0,0 +1,6 @@
+from united_addon.indexes import LEDGER_DOCTYPE, ensure_indexes
+
+
+def execute():
+    # Partners with ledger changes since the last reconciliation run
+    ensure_indexes([(LEDGER_DOCTYPE, "modified_sales_partner_index", ["modified", "sales_partner"])])
@@ -0,0 +1,6 @@
+from united_addon.indexes import LEDGER_DOCTYPE, ensure_indexes
+
+
+def execute():
+    # Keyset scan of a partner's changes behind sync_transactions
+    ensure_indexes([(LEDGER_DOCTYPE, "sales_partner_modified_name_index", ["sales_partner", "modified", "name"])])
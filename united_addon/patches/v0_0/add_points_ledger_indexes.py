@@ -0,0 +1,5 @@
+from united_addon.indexes import ensure_indexes
+
+
+def execute():
+    ensure_indexes()
@@ -0,0 +1,10 @@
+import frappe
+from united_addon.api.ledger_search import ensure_search_table, rebuild_search_index
+from united_addon.indexes import ensure_indexes
+
+
+def execute():
+    ensure_search_table()
+    if frappe.db.table_exists("Sales Partner Points Ledgers"):
+        ensure_indexes()
+        rebuild_search_index()
@@ -0,0 +1,7 @@
+import frappe
+from united_addon.api.points_summary import rebuild_points_summary
+
+
+def execute():
+    if frappe.db.table_exists("Sales Partner Points Ledgers"):
+        rebuild_points_summary()
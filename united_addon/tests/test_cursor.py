@@ -0,0 +1,21 @@
+import unittest
+
+from united_addon.api.utils import decode_cursor, encode_cursor
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        cursor = encode_cursor("2026-10-01", "SPPL-0001")
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), ["2026-10-01", "SPPL-0001"])
+
+    def test_values_are_stringified(self):
+        self.assertEqual(decode_cursor(encode_cursor(None, 5)), ["", "5"])
+
+    def test_size_must_match(self):
+        self.assertIsNone(decode_cursor(encode_cursor("a", "b", "c")))
+        self.assertEqual(decode_cursor(encode_cursor("a", "b", "c"), size=3), ["a", "b", "c"])
+
+    def test_tampered_cursor_is_rejected(self):
+        for cursor in ("", "not-base64!", "e30", encode_cursor("a")[:-2] + "@@"):
+            self.assertIsNone(decode_cursor(cursor))
@@ -0,0 +1,19 @@
+import unittest
+
+from united_addon.api.utils import html_to_text
+
+
+class TestHtmlToText(unittest.TestCase):
+    def test_plain_text_is_unchanged(self):
+        self.assertEqual(html_to_text("Lock wait timeout exceeded"), "Lock wait timeout exceeded")
+
+    def test_tags_are_stripped_and_entities_unescaped(self):
+        self.assertEqual(html_to_text("<p>File &quot;a.py&quot;</p><b>Error</b>: x &lt; 1"), 'File "a.py"Error: x < 1')
+
+    def test_script_style_and_comment_bodies_are_dropped(self):
+        value = "<script>alert('x')</script><style>p {}</style><!-- note -->Message"
+        self.assertEqual(html_to_text(value), "Message")
+
+    def test_non_string_values(self):
+        self.assertEqual(html_to_text(None), "")
+        self.assertEqual(html_to_text(42), "42")
@@ -0,0 +1,77 @@
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from united_addon.api import leaderboard
+
+
+class FakeCallbacks(list):
+    def add(self, callback):
+        self.append(callback)
+
+    def run(self):
+        callbacks = list(self)
+        self.clear()
+        for callback in callbacks:
+            callback()
+
+
+class TestUpdateLeaderboards(unittest.TestCase):
+    def setUp(self):
+        self.db = SimpleNamespace(after_commit=FakeCallbacks(), after_rollback=FakeCallbacks())
+        self.cache = MagicMock()
+        self.cache.make_key.side_effect = lambda key: "site|" + key
+        self.pipeline = self.cache.pipeline.return_value
+        patcher = patch.multiple(
+            leaderboard,
+            frappe=SimpleNamespace(local=SimpleNamespace(), db=self.db, cache=self.cache),
+            getdate=lambda value: date.fromisoformat(str(value)),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def commit(self):
+        self.db.after_rollback.clear()
+        self.db.after_commit.run()
+
+    def rollback(self):
+        self.db.after_commit.clear()
+        self.db.after_rollback.run()
+
+    def increments(self):
+        return sorted(call.args[-2:] for call in self.pipeline.eval.call_args_list)
+
+    def test_credits_are_applied_after_commit(self):
+        leaderboard.update_leaderboards([
+            {"sales_partner": "SP-1", "date": "2026-10-01", "points": 40},
+            {"sales_partner": "SP-1", "date": "2026-10-02", "points": 60},
+            {"sales_partner": "SP-2", "date": "2026-09-30", "points": 10},
+            {"sales_partner": "SP-2", "date": "2026-10-03", "points": -500},
+        ])
+        self.pipeline.eval.assert_not_called()
+
+        self.commit()
+        self.assertEqual(self.increments(), [(10.0, "SP-2"), (100.0, "SP-1")])
+        keys = sorted(call.args[2] for call in self.pipeline.eval.call_args_list)
+        self.assertEqual(keys, ["site|united_addon:leaderboard:2026-09", "site|united_addon:leaderboard:2026-10"])
+
+    def test_reversal_in_the_same_transaction_cancels_out(self):
+        row = {"sales_partner": "SP-1", "date": "2026-10-01", "points": 40}
+        leaderboard.update_leaderboards([row])
+        leaderboard.update_leaderboards([row], sign=-1)
+        self.commit()
+        self.cache.pipeline.assert_not_called()
+
+    def test_rolled_back_credits_are_dropped(self):
+        leaderboard.update_leaderboards([{"sales_partner": "SP-1", "date": "2026-10-01", "points": 40}])
+        self.rollback()
+        self.assertEqual(self.db.after_commit, [])
+
+        leaderboard.update_leaderboards([{"sales_partner": "SP-1", "date": "2026-10-01", "points": 5}])
+        self.commit()
+        self.assertEqual(self.increments(), [(5.0, "SP-1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from frappe import _dict
+
+from united_addon.api import ledger_archive
+
+CUTOFF = date(2026, 4, 1)
+
+
+def rows(*dates):
+    return [_dict(name=f"SPPL-{idx}", date=date.fromisoformat(value)) for idx, value in enumerate(dates)]
+
+
+class TestFetchLedgerPage(unittest.TestCase):
+    def fetch(self, hot_rows, **kwargs):
+        with patch.multiple(
+            ledger_archive,
+            get_archive_cutoff=lambda: CUTOFF,
+            getdate=lambda value: value if isinstance(value, date) else date.fromisoformat(value),
+            _select_page=lambda *args: hot_rows,
+            _select_merged_page=lambda *args: "merged",
+        ):
+            return ledger_archive.fetch_ledger_page("sales_partner = %s", ["SP-1"], 2, **kwargs)
+
+    def test_full_hot_page_after_the_cutoff_skips_the_archive(self):
+        page = rows("2026-10-02", "2026-10-01")
+        self.assertEqual(self.fetch(page), page)
+
+    def test_range_after_the_cutoff_reads_only_the_hot_table(self):
+        page = rows("2026-10-02")
+        self.assertEqual(self.fetch(page, from_date="2026-04-01"), page)
+
+    def test_short_hot_page_continues_into_the_archive(self):
+        self.assertEqual(self.fetch(rows("2026-10-02")), "merged")
+
+    def test_back_dated_hot_row_is_merged_with_the_archive(self):
+        # A hot row dated before the cutoff must sort in among the archived rows
+        self.assertEqual(self.fetch(rows("2026-10-02", "2026-03-15")), "merged")
+
+    def test_cursor_before_the_cutoff_merges_both_tables(self):
+        self.assertEqual(self.fetch(rows(), cursor=["2026-03-31", "SPPL-9"]), "merged")
+
+
+class TestFetchRecentLedgers(unittest.TestCase):
+    def row(self, sales_partner, name, value):
+        return _dict(sales_partner=sales_partner, name=name, date=date.fromisoformat(value))
+
+    def test_partners_short_of_recent_rows_continue_into_the_archive(self):
+        hot = [
+            self.row("SP-1", "SPPL-4", "2026-10-02"), self.row("SP-1", "SPPL-3", "2026-10-01"),
+            self.row("SP-2", "SPPL-5", "2026-06-01"),
+            self.row("SP-3", "SPPL-8", "2026-09-01"), self.row("SP-3", "SPPL-7", "2026-03-01"),
+        ]
+        archived = [
+            self.row("SP-2", "SPPL-2", "2026-02-01"), self.row("SP-2", "SPPL-1", "2026-01-01"),
+            self.row("SP-3", "SPPL-6", "2026-03-20"),
+        ]
+        queried = []
+
+        def select_recent(table, fields, sales_partners, limit):
+            queried.append((table, list(sales_partners)))
+            return hot if table == ledger_archive.LEDGER_TABLE else [r for r in archived if r.sales_partner in sales_partners]
+
+        with patch.multiple(
+            ledger_archive,
+            get_archive_cutoff=lambda: CUTOFF,
+            getdate=lambda value: value,
+            _select_recent=select_recent,
+        ):
+            recent = ledger_archive.fetch_recent_ledgers(["SP-1", "SP-2", "SP-3"], 2)
+
+        # SP-3's second hot row is back-dated before the cutoff, an archived row is newer
+        self.assertEqual(queried[1], (ledger_archive.ARCHIVE_TABLE, ["SP-2", "SP-3"]))
+        self.assertEqual(
+            [(r.sales_partner, r.name) for r in recent],
+            [("SP-1", "SPPL-4"), ("SP-1", "SPPL-3"), ("SP-2", "SPPL-5"), ("SP-2", "SPPL-2"),
+             ("SP-3", "SPPL-8"), ("SP-3", "SPPL-6")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+import unittest
+
+from united_addon.api.ledger_search import get_grams
+
+
+class TestGetGrams(unittest.TestCase):
+    def test_trigrams_are_lowercased(self):
+        self.assertEqual(get_grams("SINV-1"), {"sin", "inv", "nv-", "v-1"})
+
+    def test_grams_of_several_values_are_merged(self):
+        self.assertEqual(get_grams("abcd", None, "bcde"), {"abc", "bcd", "cde"})
+
+    def test_short_or_empty_values_have_no_grams(self):
+        self.assertEqual(get_grams("ab"), set())
+        self.assertEqual(get_grams(None, ""), set())
@@ -0,0 +1,101 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from united_addon.api import reconciliation
+
+
+class FakeInnoDB:
+    # Enough of InnoDB's repeatable read for the reconciliation queries: the first plain
+    # read of a transaction fixes its snapshot, locking reads see the latest commit
+    def __init__(self, balances, ledger):
+        self.balances = dict(balances)
+        self.ledger = list(ledger)
+        self.globals = {reconciliation.WATERMARK_KEY: "2026-10-18 09:00:00"}
+        self.snapshot = None
+        self.updates = []
+        self.on_lock = None
+
+    def _read(self):
+        if self.snapshot is None:
+            self.snapshot = list(self.ledger)
+        return self.snapshot
+
+    def commit(self):
+        self.snapshot = None
+
+    def get_global(self, key):
+        self._read()
+        return self.globals.get(key)
+
+    def set_global(self, key, value):
+        self.globals[key] = value
+
+    def sql_list(self, query, params):
+        return sorted({sales_partner for sales_partner, _ in self._read()})
+
+    def sql(self, query, params):
+        if "FOR UPDATE" in query:
+            if self.on_lock:
+                # A concurrent writer that held the rows commits while the lock is awaited
+                self.on_lock(self)
+            return [(sp, self.balances[sp]) for sp in params["sales_partners"]]
+        if "SUM(points)" in query:
+            totals = {}
+            for sales_partner, points in self._read():
+                if sales_partner in params["sales_partners"]:
+                    totals[sales_partner] = totals.get(sales_partner, 0) + points
+            return list(totals.items())
+        if query.strip().startswith("UPDATE"):
+            pairs = params[:-1]
+            for sales_partner, points in zip(pairs[::2], pairs[1::2]):
+                self.updates.append(sales_partner)
+                self.balances[sales_partner] = points
+            return []
+        raise AssertionError(f"Unexpected query: {query}")
+
+    def earn(self, sales_partner, points):
+        self.ledger.append((sales_partner, points))
+        self.balances[sales_partner] += points
+
+
+class TestReconcileEarnedPoints(unittest.TestCase):
+    def run_reconciliation(self, db):
+        site = SimpleNamespace(db=db, cache=MagicMock(), logger=MagicMock())
+        with patch.multiple(
+            reconciliation,
+            frappe=site,
+            now=lambda: "2026-10-18 10:00:00",
+            get_sync_settle_seconds=lambda: 60,
+            add_to_date=lambda date, seconds, **kwargs: f"{date} {seconds:+d}s",
+            get_archived_points=lambda sales_partners: {},
+            bump_partner_version=MagicMock(),
+            mark_partner_writes=MagicMock(),
+        ):
+            return reconciliation.reconcile_earned_points()
+
+    def test_drifted_balance_is_corrected(self):
+        db = FakeInnoDB({"SP-1": 100, "SP-2": 70}, [("SP-1", 100), ("SP-2", 50)])
+        metrics = self.run_reconciliation(db)
+        self.assertEqual(db.balances, {"SP-1": 100, "SP-2": 50})
+        self.assertEqual(db.updates, ["SP-2"])
+        self.assertEqual((metrics["checked"], metrics["drifted"]), (2, 1))
+
+    def test_ledger_insert_committed_while_waiting_for_the_lock_is_kept(self):
+        db = FakeInnoDB({"SP-1": 100, "SP-2": 50}, [("SP-1", 100), ("SP-2", 50)])
+        db.on_lock = lambda db: db.earn("SP-1", 25)
+        metrics = self.run_reconciliation(db)
+
+        self.assertEqual(db.balances["SP-1"], 125)
+        self.assertEqual(db.updates, [])
+        self.assertEqual(metrics["drifted"], 0)
+
+    def test_next_run_overlaps_by_the_settle_window(self):
+        # Rows stamped before this run started may commit after its scan
+        db = FakeInnoDB({"SP-1": 100}, [("SP-1", 100)])
+        self.run_reconciliation(db)
+        self.assertEqual(db.globals[reconciliation.WATERMARK_KEY], "2026-10-18 10:00:00 -60s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import frappe
+from united_addon.api.utils import apply_response_shape, shape_rows
+
+
+TRANSACTIONS = [
+    {"transaction_id": "SPPL-0002", "date": "2026-10-02", "amount": 40, "sales_invoice": "SINV-0002", "type": "credit"},
+    {"transaction_id": "SPPL-0001", "date": "2026-10-01", "amount": -15, "sales_invoice": "", "type": "debit"},
+]
+
+
+class TestShapeRows(unittest.TestCase):
+    def test_projection_keeps_requested_fields_in_order(self):
+        self.assertEqual(shape_rows(TRANSACTIONS, ["amount", "date"]), [
+            {"amount": 40, "date": "2026-10-02"},
+            {"amount": -15, "date": "2026-10-01"},
+        ])
+
+    def test_unknown_field_is_none(self):
+        self.assertEqual(shape_rows(TRANSACTIONS[:1], ["date", "missing"]), [{"date": "2026-10-02", "missing": None}])
+
+    def test_compact_uses_first_row_columns(self):
+        self.assertEqual(shape_rows(TRANSACTIONS, compact=True), {
+            "columns": ["transaction_id", "date", "amount", "sales_invoice", "type"],
+            "rows": [
+                ["SPPL-0002", "2026-10-02", 40, "SINV-0002", "credit"],
+                ["SPPL-0001", "2026-10-01", -15, "", "debit"],
+            ],
+        })
+
+    def test_compact_projection(self):
+        self.assertEqual(shape_rows(TRANSACTIONS, ["date", "amount"], compact=True), {
+            "columns": ["date", "amount"],
+            "rows": [["2026-10-02", 40], ["2026-10-01", -15]],
+        })
+
+    def test_empty_rows(self):
+        self.assertEqual(shape_rows([], compact=True), {"columns": [], "rows": []})
+        self.assertEqual(shape_rows([], ["date"], compact=True), {"columns": ["date"], "rows": []})
+        self.assertEqual(shape_rows([], ["date"]), [])
+
+
+class TestApplyResponseShape(unittest.TestCase):
+    def test_only_declared_keys_are_shaped(self):
+        data = {
+            "sales_partner": "SP-0001",
+            "transactions": TRANSACTIONS,
+            "partners": [{"sales_partner": "SP-0002"}],
+            "pagination": {"page": 1},
+        }
+        shaped = apply_response_shape(data, ["transactions"], frappe._dict({"fields": ["date"], "compact": 0}))
+
+        self.assertEqual(shaped["transactions"], [{"date": "2026-10-02"}, {"date": "2026-10-01"}])
+        self.assertEqual(shaped["partners"], [{"sales_partner": "SP-0002"}])
+        self.assertEqual(shaped["pagination"], {"page": 1})
+        self.assertEqual(shaped["sales_partner"], "SP-0001")
+
+    def test_no_shape_returns_data_unchanged(self):
+        data = {"transactions": TRANSACTIONS}
+        self.assertIs(apply_response_shape(data, ["transactions"], frappe._dict({"fields": [], "compact": 0})), data)
+
+    def test_cached_payload_is_not_mutated(self):
+        data = {"transactions": list(TRANSACTIONS)}
+        apply_response_shape(data, ["transactions"], frappe._dict({"fields": [], "compact": 1}))
+        self.assertEqual(data["transactions"], TRANSACTIONS)
+
+    def test_non_dict_data_is_left_alone(self):
+        shape = frappe._dict({"fields": ["date"], "compact": 1})
+        self.assertEqual(apply_response_shape(TRANSACTIONS, ["transactions"], shape), TRANSACTIONS)
+        self.assertEqual(apply_response_shape("ok", ["transactions"], shape), "ok")
@@ -0,0 +1,137 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import frappe
+
+from united_addon.api import tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class FakeCache:
+    # frappe.cache get_value / set_value with expiry, on the test clock
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+
+    def get_value(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= self.clock.time():
+            return None
+        return value
+
+    def set_value(self, key, value, expires_in_sec=None):
+        self.values[key] = (value, self.clock.time() + expires_in_sec if expires_in_sec else None)
+
+
+class TestTokens(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.hashes = iter(range(1_000_000))
+        self.site = SimpleNamespace(
+            conf={},
+            cache=FakeCache(self.clock),
+            generate_hash=lambda length=10: f"{next(self.hashes):0{length}d}",
+            _dict=frappe._dict,
+        )
+        for target, value in (
+            ("frappe", self.site),
+            ("time", self.clock),
+            ("get_encryption_key", lambda: "site-encryption-key"),
+        ):
+            patcher = patch.object(tokens, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.identity = frappe._dict(user="partner@example.com", employee="EMP-0001", sales_partner="SP-0001")
+
+    def issue(self):
+        return tokens.issue_tokens(self.identity)
+
+    def test_issued_tokens_verify(self):
+        issued = self.issue()
+        claims = tokens.verify_token(issued["access_token"])
+        self.assertEqual((claims.sub, claims.emp, claims.sp), ("partner@example.com", "EMP-0001", "SP-0001"))
+        self.assertEqual(tokens.verify_token(issued["refresh_token"], token_type="refresh").typ, "refresh")
+        self.assertEqual(issued["expires_in"], tokens.ACCESS_TOKEN_TTL)
+
+    def test_token_type_must_match(self):
+        issued = self.issue()
+        self.assertIsNone(tokens.verify_token(issued["refresh_token"]))
+        self.assertIsNone(tokens.verify_token(issued["access_token"], token_type="refresh"))
+
+    def test_tampered_tokens_are_rejected(self):
+        token = self.issue()["access_token"]
+        payload, signature = token.split(".")
+        forged = tokens._b64encode(tokens._b64decode(payload).replace(b"partner@", b"attacker"))
+        for tampered in (
+            f"{forged}.{signature}",
+            f"{payload}.{signature[:-2]}AA",
+            payload,
+            f"{payload}.{signature}.extra",
+            "",
+            "not base64.at all",
+        ):
+            self.assertIsNone(tokens.verify_token(tampered))
+
+    def test_token_signed_with_another_key_is_rejected(self):
+        token = self.issue()["access_token"]
+        self.site.conf["united_addon_token_secret"] = "rotated"
+        self.assertIsNone(tokens.verify_token(token))
+
+    def test_claims_without_subject_are_rejected(self):
+        self.assertIsNone(tokens.verify_token(tokens._sign({"typ": "access", "exp": self.clock.now + 60, "jti": "x"})))
+
+    def test_expired_token_is_rejected(self):
+        token = self.issue()["access_token"]
+        self.clock.now += tokens.ACCESS_TOKEN_TTL - 1
+        self.assertIsNotNone(tokens.verify_token(token))
+        self.clock.now += 1
+        self.assertIsNone(tokens.verify_token(token))
+
+    def test_revoked_token_is_rejected(self):
+        first, second = self.issue(), self.issue()
+        tokens.revoke_token(tokens.verify_token(first["access_token"]))
+        self.assertIsNone(tokens.verify_token(first["access_token"]))
+        self.assertIsNotNone(tokens.verify_token(second["access_token"]))
+
+    def test_tokens_issued_before_user_revocation_are_rejected(self):
+        before = self.issue()
+        tokens.revoke_user_tokens(self.identity.user)
+        self.assertIsNone(tokens.verify_token(before["access_token"]))
+        self.assertIsNone(tokens.verify_token(before["refresh_token"], token_type="refresh"))
+
+        self.clock.now += 2
+        after = self.issue()
+        self.assertIsNotNone(tokens.verify_token(after["access_token"]))
+        self.assertIsNotNone(tokens.verify_token(after["refresh_token"], token_type="refresh"))
+
+    def test_refresh_tokens_survive_access_only_revocation(self):
+        issued = self.issue()
+        tokens.revoke_user_tokens(self.identity.user, include_refresh=False)
+        self.assertIsNone(tokens.verify_token(issued["access_token"]))
+        self.assertIsNotNone(tokens.verify_token(issued["refresh_token"], token_type="refresh"))
+
+    def test_revocation_outlives_configured_token_ttls(self):
+        self.site.conf.update(united_addon_access_token_ttl=6 * 60 * 60, united_addon_refresh_token_ttl=90 * 24 * 60 * 60)
+        issued = self.issue()
+        self.assertEqual(issued["expires_in"], 6 * 60 * 60)
+        tokens.revoke_user_tokens(self.identity.user)
+
+        # Revoked tokens stay rejected until the moment they would have expired anyway
+        self.clock.now += 6 * 60 * 60 - 1
+        self.assertIsNone(tokens.verify_token(issued["access_token"]))
+        self.clock.now += 90 * 24 * 60 * 60 - 6 * 60 * 60
+        self.assertIsNone(tokens.verify_token(issued["refresh_token"], token_type="refresh"))
+        self.clock.now += 1
+        self.assertIsNone(tokens.verify_token(issued["refresh_token"], token_type="refresh"))
+
+
+if __name__ == "__main__":
+    unittest.main()
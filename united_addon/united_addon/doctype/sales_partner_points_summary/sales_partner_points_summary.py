@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Hidayatali and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class SalesPartnerPointsSummary(Document):
+    pass
+
+
+def on_doctype_update():
+    frappe.db.add_unique(
+        "Sales Partner Points Summary",
+        ["sales_partner", "period_type", "period_start"],
+        constraint_name="unique_partner_period",
+    )